@@ -1,82 +1,79 @@
 import argparse
-import json
-from db import get_connection
-from ad_performance.get_meta_performance import get_performance_by_utm_codes
+from db import run_plan
+from async_db import run_plan_async
+from ad_performance.get_meta_performance import rollup_source
+from checklists.utm_codes import CHECKLIST_UTM_CODES_TABLE
 
 
 def get_performance_by_copy_type(month: str, team_id: str = None) -> list[dict]:
-    conn = get_connection()
-    cur = conn.cursor()
+    return run_plan(copy_type_performance_plan(month, team_id))
 
-    if team_id:
-        cur.execute(
-            """
-            SELECT c.utm_code, ct.code, ct.name
-            FROM checklists c
-            JOIN copy_types ct ON c.copy_type_id = ct.id
-            JOIN team_products tp ON c.product_id = tp.product_id
-            WHERE c.utm_code IS NOT NULL AND c.utm_code != ''
-              AND tp.team_id = %s
-            """,
-            (team_id,),
-        )
-    else:
-        cur.execute(
-            """
-            SELECT c.utm_code, ct.code, ct.name
-            FROM checklists c
-            JOIN copy_types ct ON c.copy_type_id = ct.id
-            WHERE c.utm_code IS NOT NULL AND c.utm_code != ''
-            """
-        )
 
-    rows = cur.fetchall()
-    cur.close()
+async def get_performance_by_copy_type_async(month: str, team_id: str = None) -> list[dict]:
+    """get_performance_by_copy_type의 async 버전 (async 커넥션 풀 사용)"""
+    return await run_plan_async(copy_type_performance_plan(month, team_id))
 
-    if not rows:
-        return []
 
-    # Parse JSON utm_code arrays and flatten
-    parsed_rows = []
-    for utm_code_raw, copy_type_code, copy_type_name in rows:
-        try:
-            codes = json.loads(utm_code_raw)
-            if isinstance(codes, list):
-                for code in codes:
-                    parsed_rows.append((code, copy_type_code, copy_type_name))
-            else:
-                parsed_rows.append((str(codes), copy_type_code, copy_type_name))
-        except (json.JSONDecodeError, TypeError):
-            parsed_rows.append((utm_code_raw, copy_type_code, copy_type_name))
+def copy_type_performance_plan(month: str, team_id: str = None):
+    """
+    카피 타입별 성과 쿼리 플랜 (db.run_plan 참고)
+    checklist_utm_codes 조인, (UTM, 카피 타입) 중복 제거, 롤업 조인과 카피 타입별 합계를 한 쿼리로 처리
+    """
+    team_join = ""
+    team_filter = ""
+    params = []
+    if team_id:
+        team_join = "JOIN team_products tp ON c.product_id = tp.product_id"
+        team_filter = "WHERE tp.team_id = %s"
+        params.append(team_id)
 
-    utm_codes = list({row[0] for row in parsed_rows})
-    perf_map = get_performance_by_utm_codes(utm_codes, month)
+    source, source_params = rollup_source(
+        "utm_code IN (SELECT ad_performance.normalize_utm_code(utm_code) FROM codes)", [], month
+    )
+    rows = yield (
+        f"""
+        WITH codes AS (
+            SELECT DISTINCT ON (u.utm_code, ct.code) u.utm_code, ct.code AS copy_type_code, ct.name AS copy_type_name
+            FROM checklists c
+            JOIN copy_types ct ON c.copy_type_id = ct.id
+            JOIN {CHECKLIST_UTM_CODES_TABLE} u ON u.checklist_id = c.id
+            {team_join}
+            {team_filter}
+        ), perf AS (
+            SELECT utm_code,
+                SUM(spend) AS spend,
+                SUM(impressions) AS impressions,
+                SUM(clicks) AS clicks,
+                trunc(SUM(revenue)) AS revenue
+            FROM {source}
+            GROUP BY utm_code
+            HAVING SUM(meta_records) > 0
+        )
+        SELECT codes.copy_type_code,
+            MIN(codes.copy_type_name),
+            SUM(p.spend),
+            SUM(p.impressions),
+            SUM(p.clicks),
+            SUM(p.revenue),
+            COUNT(*)
+        FROM codes
+        JOIN perf p ON p.utm_code = ad_performance.normalize_utm_code(codes.utm_code)
+        GROUP BY codes.copy_type_code
+        """,
+        params + source_params,
+    )
 
     groups = {}
-    seen = set()
-    for utm_code, copy_type_code, copy_type_name in parsed_rows:
-        if (utm_code, copy_type_code) in seen:
-            continue
-        seen.add((utm_code, copy_type_code))
-        perf = perf_map.get(utm_code)
-        if not perf:
-            continue
-        if copy_type_code not in groups:
-            groups[copy_type_code] = {
-                "copy_type_code": copy_type_code,
-                "copy_type_name": copy_type_name,
-                "total_spend": 0.0,
-                "total_impressions": 0,
-                "total_clicks": 0,
-                "total_revenue": 0,
-                "utm_count": 0,
-            }
-        g = groups[copy_type_code]
-        g["total_spend"] += perf.get("spend", 0)
-        g["total_impressions"] += perf.get("impressions", 0)
-        g["total_clicks"] += perf.get("clicks", 0)
-        g["total_revenue"] += perf.get("revenue", 0)
-        g["utm_count"] += 1
+    for copy_type_code, copy_type_name, spend, impressions, clicks, revenue, utm_count in rows:
+        groups[copy_type_code] = {
+            "copy_type_code": copy_type_code,
+            "copy_type_name": copy_type_name,
+            "total_spend": float(spend),
+            "total_impressions": int(impressions),
+            "total_clicks": int(clicks),
+            "total_revenue": int(revenue),
+            "utm_count": utm_count,
+        }
 
     result = []
     for g in groups.values():
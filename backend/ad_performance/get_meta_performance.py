@@ -1,11 +1,18 @@
 import argparse
-from db import get_connection
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from db import run_plan
+from async_db import run_plan_async
+from ad_performance.utm import UTM_MONTHLY_ROLLUP_TABLE, UTM_ROLLUP_TABLE, by_requested_code, utm_match
+
+KST = ZoneInfo("Asia/Seoul")
+ROLLUP_COLUMNS = "utm_code, spend, impressions, clicks, meta_records, revenue, conversions"
 
 
 def get_performance_by_utm_codes(utm_codes: list[str], month: str) -> dict:
     """
     UTM 코드 목록으로 Meta 광고 성과 데이터를 조회합니다.
-    ad_code에서 괄호 부분을 제거하여 UTM 코드와 매칭합니다.
+    ad_code와 UTM 코드를 정규화 규칙(ad_performance.utm)으로 매칭합니다.
 
     Args:
         utm_codes: UTM 코드 리스트
@@ -14,88 +21,83 @@ def get_performance_by_utm_codes(utm_codes: list[str], month: str) -> dict:
     Returns:
         { utm_code: { spend, impressions, clicks, ctr, revenue, conversions } }
     """
+    return run_plan(performance_plan(utm_codes, month))
+
+
+async def get_performance_by_utm_codes_async(utm_codes: list[str], month: str) -> dict:
+    """get_performance_by_utm_codes의 async 버전 (async 커넥션 풀 사용)"""
+    return await run_plan_async(performance_plan(utm_codes, month))
+
+
+def rollup_source(match: str, match_params: list, month: str) -> tuple[str, list]:
+    """
+    month에 맞는 롤업 행 출처 (FROM 절)와 파라미터.
+    마감된 월은 월 집계에서, 진행 중인 월은 일 집계에서, "all"은 마감 월 집계 + 진행 중인 월의 일 집계.
+    match는 utm_code 컬럼에 대한 조건
+    """
+    open_month = datetime.now(KST).date().replace(day=1)
+    if month == "all":
+        source = f"""(
+            SELECT {ROLLUP_COLUMNS} FROM {UTM_MONTHLY_ROLLUP_TABLE} WHERE {match} AND month < %s
+            UNION ALL
+            SELECT {ROLLUP_COLUMNS} FROM {UTM_ROLLUP_TABLE} WHERE {match} AND date >= %s
+        ) r"""
+        return source, match_params + [open_month] + match_params + [open_month]
+
+    year, m = month.split('-')
+    start_date = date(int(year), int(m), 1)
+    if start_date < open_month:
+        return f"{UTM_MONTHLY_ROLLUP_TABLE} WHERE {match} AND month = %s", match_params + [start_date]
+
+    # 다음 달 1일 계산
+    end_date = (start_date + timedelta(days=32)).replace(day=1)
+    return f"{UTM_ROLLUP_TABLE} WHERE {match} AND date >= %s AND date < %s", match_params + [start_date, end_date]
+
+
+def performance_plan(utm_codes: list[str], month: str):
+    """UTM 성과 조회 쿼리 플랜 (db.run_plan 참고). 다른 리포트 플랜에서 yield from으로 재사용"""
     if not utm_codes:
         return {}
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    try:
-        # month에서 시작/종료 날짜 계산
-        if month == "all":
-            date_filter = ""
-            date_params = []
-        else:
-            year, m = month.split('-')
-            start_date = f"{year}-{m}-01"
-            # 다음 달 1일 계산
-            next_month = int(m) + 1
-            next_year = int(year)
-            if next_month > 12:
-                next_month = 1
-                next_year += 1
-            end_date = f"{next_year}-{str(next_month).zfill(2)}-01"
-            date_filter = "AND date >= %s AND date < %s"
-            date_params = [start_date, end_date]
-
-        placeholders = ','.join(['%s'] * len(utm_codes))
-        sql = f"""
-            WITH meta AS (
-                SELECT regexp_replace(ad_code, '^\\[[^]]*\\]', '') AS utm_code,
-                    COALESCE(SUM(spend), 0) AS spend,
-                    COALESCE(SUM(impressions), 0) AS impressions,
-                    COALESCE(SUM(clicks), 0) AS clicks,
-                    CASE WHEN COALESCE(SUM(impressions), 0) > 0
-                        THEN ROUND((COALESCE(SUM(clicks), 0)::numeric / SUM(impressions)) * 100, 2)
-                        ELSE 0 END AS ctr,
-                    CASE WHEN COALESCE(SUM(clicks), 0) > 0
-                        THEN ROUND(COALESCE(SUM(spend), 0)::numeric / SUM(clicks), 0)
-                        ELSE 0 END AS cpc
-                FROM ad_performance.meta_daily_perform
-                WHERE regexp_replace(ad_code, '^\\[[^]]*\\]', '') IN ({placeholders})
-                    {date_filter}
-                GROUP BY 1
-            ),
-            cafe AS (
-                SELECT ad_code AS utm_code,
-                    COALESCE(SUM(revenue), 0) AS revenue,
-                    COALESCE(SUM(conversions), 0) AS conversions
-                FROM ad_performance.cafe24_daily_perform
-                WHERE ad_code IN ({placeholders})
-                    {date_filter}
-                GROUP BY 1
-            )
-            SELECT m.utm_code, m.spend, m.impressions, m.clicks, m.ctr, m.cpc,
-                COALESCE(c.revenue, 0) AS revenue,
-                COALESCE(c.conversions, 0) AS conversions,
-                CASE WHEN m.spend > 0 THEN ROUND(COALESCE(c.revenue, 0)::numeric / m.spend * 100, 0) ELSE 0 END AS roas
-            FROM meta m LEFT JOIN cafe c ON m.utm_code = c.utm_code
-        """
-
-        params = utm_codes + date_params + utm_codes + date_params
-        cur.execute(sql, params)
-
-        columns = [desc[0] for desc in cur.description]
-        rows = cur.fetchall()
-
-        result = {}
-        for row in rows:
-            row_dict = dict(zip(columns, row))
-            utm = row_dict['utm_code']
-            result[utm] = {
-                'spend': float(row_dict['spend']),
-                'impressions': int(row_dict['impressions']),
-                'clicks': int(row_dict['clicks']),
-                'ctr': float(row_dict['ctr']),
-                'cpc': float(row_dict['cpc']),
-                'revenue': int(row_dict['revenue']),
-                'conversions': int(row_dict['conversions']),
-                'roas': int(row_dict['roas']),
-            }
-
-        return result
-    finally:
-        cur.close()
+    # 정규화 UTM 코드 기준 집계 (meta 행이 있는 UTM만)
+    match, match_params = utm_match(utm_codes)
+    source, params = rollup_source(match, match_params, month)
+
+    sql = f"""
+        SELECT utm_code,
+            SUM(spend) AS spend,
+            SUM(impressions) AS impressions,
+            SUM(clicks) AS clicks,
+            CASE WHEN SUM(impressions) > 0
+                THEN ROUND((SUM(clicks)::numeric / SUM(impressions)) * 100, 2)
+                ELSE 0 END AS ctr,
+            CASE WHEN SUM(clicks) > 0
+                THEN ROUND(SUM(spend)::numeric / SUM(clicks), 0)
+                ELSE 0 END AS cpc,
+            SUM(revenue) AS revenue,
+            SUM(conversions) AS conversions,
+            CASE WHEN SUM(spend) > 0 THEN ROUND(SUM(revenue)::numeric / SUM(spend) * 100, 0) ELSE 0 END AS roas
+        FROM {source}
+        GROUP BY utm_code
+        HAVING SUM(meta_records) > 0
+    """
+
+    rows = yield sql, params
+
+    by_utm = {}
+    for utm, spend, impressions, clicks, ctr, cpc, revenue, conversions, roas in rows:
+        by_utm[utm] = {
+            'spend': float(spend),
+            'impressions': int(impressions),
+            'clicks': int(clicks),
+            'ctr': float(ctr),
+            'cpc': float(cpc),
+            'revenue': int(revenue),
+            'conversions': int(conversions),
+            'roas': int(roas),
+        }
+
+    return by_requested_code(utm_codes, by_utm)
 
 
 def main(utm_codes: list[str], month: str):
@@ -2,7 +2,10 @@ import argparse
 import json
 from datetime import datetime, timedelta
 
-from db import get_connection
+from db import any_clause, array_param, run_plan
+from async_db import run_plan_async
+from ad_performance.utm import UTM_ROLLUP_TABLE, normalize_utm_code
+from checklists.utm_codes import CHECKLIST_UTM_CODES_TABLE
 
 
 def generate_weeks(start_week: str, end_week: str) -> list[str]:
@@ -22,79 +25,69 @@ def week_to_date_range(week: str) -> tuple[str, str]:
 
 
 def get_weekly_team_performance(start_week: str, end_week: str, team_ids: list[str]) -> dict:
-    conn = get_connection()
-    cur = conn.cursor()
+    return run_plan(weekly_team_performance_plan(start_week, end_week, team_ids))
 
+
+async def get_weekly_team_performance_async(start_week: str, end_week: str, team_ids: list[str]) -> dict:
+    """get_weekly_team_performance의 async 버전 (async 커넥션 풀 사용)"""
+    return await run_plan_async(weekly_team_performance_plan(start_week, end_week, team_ids))
+
+
+def weekly_team_performance_plan(start_week: str, end_week: str, team_ids: list[str]):
+    """팀별 주간 성과 쿼리 플랜 (db.run_plan 참고)"""
     weeks = generate_weeks(start_week, end_week)
 
-    team_placeholders = ",".join(["%s"] * len(team_ids))
-    cur.execute(
+    team_match, team_params = any_clause("tp.team_id", team_ids)
+    rows = yield (
         f"""
-        SELECT c.week, c.utm_code, tp.team_id
+        SELECT c.week, u.utm_code, tp.team_id
         FROM checklists c
+        JOIN {CHECKLIST_UTM_CODES_TABLE} u ON u.checklist_id = c.id
         JOIN team_products tp ON tp.product_id = c.product_id
         WHERE c.week >= %s AND c.week <= %s
-          AND c.utm_code IS NOT NULL AND c.utm_code != ''
-          AND tp.team_id IN ({team_placeholders})
+          AND {team_match}
+        ORDER BY c.id, u.position
         """,
-        [start_week, end_week] + team_ids,
+        [start_week, end_week] + team_params,
     )
-    rows = cur.fetchall()
 
-    # team_id -> week -> list of utm_codes (parse JSON arrays)
+    # team_id -> week -> list of utm_codes
     team_week_codes: dict[str, dict[str, list[str]]] = {}
-    for week_val, utm_code_raw, team_id in rows:
-        team_id = str(team_id)
-        try:
-            codes = json.loads(utm_code_raw)
-            if isinstance(codes, list):
-                for code in codes:
-                    team_week_codes.setdefault(team_id, {}).setdefault(week_val, []).append(code)
-            else:
-                team_week_codes.setdefault(team_id, {}).setdefault(week_val, []).append(str(codes))
-        except (json.JSONDecodeError, TypeError):
-            team_week_codes.setdefault(team_id, {}).setdefault(week_val, []).append(utm_code_raw)
-
-    # Collect all utm_codes per week for batch querying
-    week_all_codes: dict[str, set[str]] = {}
-    for team_data in team_week_codes.values():
-        for week_val, codes in team_data.items():
-            week_all_codes.setdefault(week_val, set()).update(codes)
-
-    # Query meta_daily_perform per week
-    week_perf: dict[str, dict[str, dict]] = {}
-    for week_val in weeks:
-        codes = list(week_all_codes.get(week_val, set()))
-        if not codes:
-            week_perf[week_val] = {}
-            continue
-
-        start_date, end_date = week_to_date_range(week_val)
-        placeholders = ",".join(["%s"] * len(codes))
-        cur.execute(
+    for week_val, utm_code, team_id in rows:
+        team_week_codes.setdefault(str(team_id), {}).setdefault(week_val, []).append(utm_code)
+
+    # (주 시작일, 정규화 UTM) 쌍을 한 번에 넘겨 주별로 묶어 집계 (주마다 따로 조회하지 않음)
+    pairs = sorted({
+        (week_to_date_range(week_val)[0], normalize_utm_code(code))
+        for team_data in team_week_codes.values()
+        for week_val, codes in team_data.items()
+        for code in codes
+    })
+    week_perf: dict[tuple[str, str], dict] = {}
+    if pairs:
+        perf_rows = yield (
             f"""
             SELECT
-                regexp_replace(ad_code, '\\(.*\\)$', '') AS utm_code,
-                COALESCE(SUM(spend), 0) AS spend,
-                COALESCE(SUM(impressions), 0) AS impressions,
-                COALESCE(SUM(clicks), 0) AS clicks
-            FROM ad_performance.meta_daily_perform
-            WHERE regexp_replace(ad_code, '\\(.*\\)$', '') IN ({placeholders})
-              AND date >= %s AND date < %s
-            GROUP BY regexp_replace(ad_code, '\\(.*\\)$', '')
+                p.week_start,
+                p.utm_code,
+                SUM(r.spend) AS spend,
+                SUM(r.impressions) AS impressions,
+                SUM(r.clicks) AS clicks
+            FROM unnest(%s::date[], %s::text[]) AS p(week_start, utm_code)
+            JOIN {UTM_ROLLUP_TABLE} r
+              ON r.utm_code = p.utm_code
+             AND r.date >= p.week_start AND r.date < p.week_start + 7
+            GROUP BY p.week_start, p.utm_code
             """,
-            codes + [start_date, end_date],
+            [array_param(w for w, _ in pairs), array_param(c for _, c in pairs)],
         )
-        week_perf[week_val] = {}
-        for utm_code, spend, impressions, clicks in cur.fetchall():
-            week_perf[week_val][utm_code] = {
+        for week_start, utm_code, spend, impressions, clicks in perf_rows:
+            week_perf[(str(week_start), utm_code)] = {
                 "spend": float(spend),
                 "impressions": int(impressions),
                 "clicks": int(clicks),
             }
 
-    cur.close()
-
     # Aggregate per team per week
     zero = {"spend": 0, "impressions": 0, "clicks": 0, "ctr": 0}
     result = {}
@@ -103,9 +96,10 @@ def get_weekly_team_performance(start_week: str, end_week: str, team_ids: list[s
         result[team_id] = {}
         for week_val in weeks:
             codes = team_week_codes.get(team_id, {}).get(week_val, [])
+            week_start = week_to_date_range(week_val)[0]
             totals = {"spend": 0.0, "impressions": 0, "clicks": 0}
             for code in codes:
-                perf = week_perf.get(week_val, {}).get(code, {})
+                perf = week_perf.get((week_start, normalize_utm_code(code)), {})
                 totals["spend"] += perf.get("spend", 0)
                 totals["impressions"] += perf.get("impressions", 0)
                 totals["clicks"] += perf.get("clicks", 0)
@@ -0,0 +1,189 @@
+import argparse
+
+import psycopg2.errors
+
+from db import any_clause, run_plan
+from ad_performance.utm import AD_CODE_UTM_TABLE, UTM_MONTHLY_ROLLUP_TABLE, UTM_ROLLUP_TABLE, UTM_SPEND_STATE_TABLE
+
+# meta / cafe24 원본이 바뀐 날짜 (원본 테이블 트리거가 기록, migrate_utm_daily_rollup.py)
+DIRTY_DATES_TABLE = "ad_performance.utm_rollup_dirty_dates"
+
+# 스케줄러 작업이 마지막으로 남긴 오류 (같은 오류가 이어지면 다시 출력하지 않음)
+_last_job_error = None
+
+
+def refresh_utm_daily_rollup(full: bool = False) -> int:
+    """
+    원본이 바뀐 날짜만 utm_daily_rollup을 다시 집계하고, 그 날짜가 속한 월의 utm_monthly_rollup도 다시 집계
+    utm_spend_state에는 그 날짜분의 광고비 차이만 반영
+    full=True면 원본의 모든 날짜를 다시 집계
+    Returns: 다시 집계한 날짜 수
+    """
+    return run_plan(refresh_plan(full))
+
+
+def refresh_job():
+    """
+    스케줄러용 갱신 (api.py). 예외는 로그만 남기고 삼킴 — 같은 오류가 이어지면 한 번만 출력하고 복구되면 알림
+    (예: 마이그레이션 전에 배포돼 롤업 테이블이 없을 때 10분마다 같은 오류를 반복하지 않음)
+    """
+    global _last_job_error
+    try:
+        refresh_utm_daily_rollup()
+    except Exception as e:
+        message = f"{type(e).__name__}: {' '.join(str(e).split())}"
+        if message != _last_job_error:
+            print(f"[refresh_utm_daily_rollup] Failed: {message}")
+            if isinstance(e, psycopg2.errors.UndefinedTable):
+                print("[refresh_utm_daily_rollup] Run the rollup migrations (migrate_utm_*.py); retrying quietly until then")
+        _last_job_error = message
+        return
+    if _last_job_error is not None:
+        print("[refresh_utm_daily_rollup] Recovered")
+        _last_job_error = None
+
+
+def refresh_plan(full: bool = False):
+    """롤업 갱신 쿼리 플랜 (db.run_plan 참고). 날짜 단위로 지우고 다시 채우는 한 트랜잭션"""
+    yield "BEGIN", None
+    # 여러 프로세스(스케줄러)가 동시에 갱신하지 않도록 직렬화
+    yield f"SELECT pg_advisory_xact_lock(hashtext('{UTM_ROLLUP_TABLE}'))", None
+    if full:
+        yield (
+            f"""
+            INSERT INTO {DIRTY_DATES_TABLE} (date)
+            SELECT date FROM ad_performance.meta_daily_perform WHERE date IS NOT NULL
+            UNION
+            SELECT date FROM ad_performance.cafe24_daily_perform WHERE date IS NOT NULL
+            UNION
+            SELECT date FROM {UTM_ROLLUP_TABLE}
+            ON CONFLICT (date) DO NOTHING
+            """,
+            None,
+        )
+    # 커밋 전 쓰기 트랜잭션이 잠근 날짜는 건너뛰고 다음 갱신에서 처리 (기다리지 않아 수집 쪽과 교착도 없음)
+    rows = yield (
+        f"""
+        DELETE FROM {DIRTY_DATES_TABLE}
+        WHERE date IN (SELECT date FROM {DIRTY_DATES_TABLE} FOR UPDATE SKIP LOCKED)
+        RETURNING date
+        """,
+        None,
+    )
+    dates = sorted(row[0] for row in rows)
+    if dates:
+        rollup_match, params = any_clause("date", dates)
+        source_match = any_clause("p.date", dates)[0]
+        # 소진 상태에서 다시 집계할 날짜의 기존 광고비를 빼고
+        yield (
+            f"""
+            UPDATE {UTM_SPEND_STATE_TABLE} s
+            SET lifetime_spend = s.lifetime_spend - o.spend
+            FROM (
+                SELECT utm_code, SUM(spend) AS spend
+                FROM {UTM_ROLLUP_TABLE}
+                WHERE {rollup_match}
+                GROUP BY utm_code
+            ) o
+            WHERE s.utm_code = o.utm_code
+            """,
+            params,
+        )
+        yield f"DELETE FROM {UTM_ROLLUP_TABLE} WHERE {rollup_match}", params
+        # 첫/마지막 소진일이 다시 집계할 날짜인 UTM만 나머지 날짜로 다시 계산 (드묾, utm_code 인덱스)
+        yield (
+            f"""
+            UPDATE {UTM_SPEND_STATE_TABLE} s
+            SET first_spend_date = (
+                    SELECT MIN(r.date) FROM {UTM_ROLLUP_TABLE} r WHERE r.utm_code = s.utm_code AND r.spend > 0
+                ),
+                last_spend_date = (
+                    SELECT MAX(r.date) FROM {UTM_ROLLUP_TABLE} r WHERE r.utm_code = s.utm_code AND r.spend > 0
+                )
+            WHERE {any_clause("s.first_spend_date", dates)[0]} OR {any_clause("s.last_spend_date", dates)[0]}
+            """,
+            params + params,
+        )
+        yield (
+            f"""
+            WITH meta AS (
+                SELECT u.utm_code, p.date,
+                    COALESCE(SUM(p.spend), 0) AS spend,
+                    COALESCE(SUM(p.impressions), 0) AS impressions,
+                    COALESCE(SUM(p.clicks), 0) AS clicks,
+                    COUNT(*) AS meta_records
+                FROM {AD_CODE_UTM_TABLE} u
+                JOIN ad_performance.meta_daily_perform p ON p.ad_code = u.ad_code
+                WHERE {source_match}
+                GROUP BY u.utm_code, p.date
+            ),
+            cafe AS (
+                SELECT u.utm_code, p.date,
+                    COALESCE(SUM(p.revenue), 0) AS revenue,
+                    COALESCE(SUM(p.conversions), 0) AS conversions
+                FROM {AD_CODE_UTM_TABLE} u
+                JOIN ad_performance.cafe24_daily_perform p ON p.ad_code = u.ad_code
+                WHERE {source_match}
+                GROUP BY u.utm_code, p.date
+            )
+            INSERT INTO {UTM_ROLLUP_TABLE}
+                (utm_code, date, spend, impressions, clicks, meta_records, revenue, conversions)
+            SELECT COALESCE(m.utm_code, c.utm_code), COALESCE(m.date, c.date),
+                COALESCE(m.spend, 0), COALESCE(m.impressions, 0), COALESCE(m.clicks, 0),
+                COALESCE(m.meta_records, 0), COALESCE(c.revenue, 0), COALESCE(c.conversions, 0)
+            FROM meta m
+            FULL JOIN cafe c ON c.utm_code = m.utm_code AND c.date = m.date
+            """,
+            params + params,
+        )
+        # 새로 집계한 날짜분을 소진 상태에 더함
+        yield (
+            f"""
+            INSERT INTO {UTM_SPEND_STATE_TABLE} AS s
+                (utm_code, first_spend_date, last_spend_date, lifetime_spend, last_checked)
+            SELECT utm_code,
+                MIN(date) FILTER (WHERE spend > 0),
+                MAX(date) FILTER (WHERE spend > 0),
+                SUM(spend),
+                MAX(date)
+            FROM {UTM_ROLLUP_TABLE}
+            WHERE {rollup_match}
+            GROUP BY utm_code
+            ON CONFLICT (utm_code) DO UPDATE SET
+                first_spend_date = LEAST(s.first_spend_date, EXCLUDED.first_spend_date),
+                last_spend_date = GREATEST(s.last_spend_date, EXCLUDED.last_spend_date),
+                lifetime_spend = s.lifetime_spend + EXCLUDED.lifetime_spend,
+                last_checked = GREATEST(s.last_checked, EXCLUDED.last_checked)
+            """,
+            params,
+        )
+        # 바뀐 날짜가 속한 월 전체를 일 롤업에서 다시 합산
+        months = sorted({d.replace(day=1) for d in dates})
+        month_match, month_params = any_clause("month", months)
+        yield f"DELETE FROM {UTM_MONTHLY_ROLLUP_TABLE} WHERE {month_match}", month_params
+        yield (
+            f"""
+            INSERT INTO {UTM_MONTHLY_ROLLUP_TABLE}
+                (utm_code, month, spend, impressions, clicks, meta_records, revenue, conversions)
+            SELECT r.utm_code, m.month, SUM(r.spend), SUM(r.impressions), SUM(r.clicks),
+                SUM(r.meta_records), SUM(r.revenue), SUM(r.conversions)
+            FROM unnest(%s::date[]) AS m(month)
+            JOIN {UTM_ROLLUP_TABLE} r ON r.date >= m.month AND r.date < m.month + INTERVAL '1 month'
+            GROUP BY r.utm_code, m.month
+            """,
+            month_params,
+        )
+    yield "COMMIT", None
+    return len(dates)
+
+
+def main(full: bool = False):
+    refreshed = refresh_utm_daily_rollup(full)
+    print(f"Refreshed {refreshed} dates in {UTM_ROLLUP_TABLE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the per-UTM daily rollup for dates whose raw rows changed")
+    parser.add_argument("--full", action="store_true", help="Re-aggregate every date (e.g. after the UTM rule changed)")
+    args = parser.parse_args()
+    main(args.full)
@@ -0,0 +1,45 @@
+"""
+UTM 코드 정규화 규칙 (모든 광고 성과 쿼리가 공유)
+ad_code 앞의 "[...]" 접두어와 끝의 "(...)" 접미어를 떼면 정규화된 UTM 코드
+예: "[메타]abc123(리타겟)" -> "abc123"
+
+SQL 쪽은 ad_performance.normalize_utm_code() 함수와 ad_code -> utm_code 조회 테이블
+ad_performance.ad_code_utm으로 같은 규칙을 적용 (migrate_utm_lookup.py)
+리포트는 정규화 코드별 일 집계 테이블 ad_performance.utm_daily_rollup을 조회 (refresh_rollup.py)
+"""
+import re
+
+from db import any_clause
+
+AD_CODE_UTM_TABLE = "ad_performance.ad_code_utm"
+# (utm_code, date)별 meta + cafe24 합계 (migrate_utm_daily_rollup.py)
+UTM_ROLLUP_TABLE = "ad_performance.utm_daily_rollup"
+# (utm_code, month)별 합계 — 일 롤업을 갱신할 때 해당 월도 함께 다시 집계 (migrate_utm_monthly_rollup.py)
+UTM_MONTHLY_ROLLUP_TABLE = "ad_performance.utm_monthly_rollup"
+# utm_code별 광고비 소진 상태 (첫/마지막 소진일, 누적 광고비) — 일 롤업 갱신 때 바뀐 날짜분만 반영 (migrate_utm_spend_state.py)
+UTM_SPEND_STATE_TABLE = "ad_performance.utm_spend_state"
+
+# normalize_utm_code() SQL 함수 본문과 같은 규칙 (PostgreSQL 정규식의 .은 줄바꿈도 매칭)
+NORMALIZE_UTM_SQL = r"regexp_replace(regexp_replace(ad_code, '^\[[^]]*\]', ''), '\(.*\)$', '')"
+_PREFIX_RE = re.compile(r"^\[[^\]]*\]")
+_SUFFIX_RE = re.compile(r"\(.*\)\Z", re.S)
+
+
+def normalize_utm_code(code: str) -> str:
+    """Python 쪽 정규화 (SQL normalize_utm_code와 동일)"""
+    return _SUFFIX_RE.sub("", _PREFIX_RE.sub("", code, count=1), count=1)
+
+
+def utm_match(utm_codes, column: str = "utm_code") -> tuple[str, list]:
+    """정규화한 UTM 코드 목록으로 거르는 조건과 파라미터 (utm_daily_rollup 등 정규화 코드 컬럼 대상)"""
+    return any_clause(column, sorted({normalize_utm_code(c) for c in utm_codes}))
+
+
+def by_requested_code(utm_codes, values: dict) -> dict:
+    """정규화 코드 기준 결과 -> 요청한 코드 기준 (값이 없는 코드는 제외)"""
+    result = {}
+    for code in utm_codes:
+        value = values.get(normalize_utm_code(code))
+        if value is not None:
+            result[code] = value
+    return result
@@ -2,19 +2,24 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException, Response, status, Header
+from fastapi import FastAPI, HTTPException, Request, Response, status, Header, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 from pydantic import BaseModel
 from typing import Optional
+from decimal import Decimal
+import orjson
 import uvicorn
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 # Audit
 from audit.log import write_audit_log
-from audit.list_logs import list_audit_logs
+from audit.list_logs import list_audit_logs, list_audit_logs_page
 
 # Products
 from products.list_products import list_products
@@ -31,20 +36,21 @@ from copy_types.update_copy_type import update_copy_type
 from copy_types.delete_copy_type import delete_copy_type
 
 # Copies
-from copies.list_copies import list_copies
+from copies.list_copies import iter_copies, list_copies_page
 from copies.get_copy import get_copy
 from copies.create_copy import create_copy
 from copies.update_copy import update_copy
 from copies.delete_copy import delete_copy
 
 # Checklists
-from checklists.list_checklists import list_checklists
+from checklists.list_checklists import list_checklists, list_checklists_page
 from checklists.get_stats import get_checklist_stats
 from checklists.update_checklist import update_checklist
 from checklists.init_week import init_week_checklists
-from checklists.list_with_utm import list_checklists_with_utm
+from checklists.list_with_utm import iter_checklists_with_utm, list_checklists_with_utm_page
 from checklists.check_alive_ads import check_alive_ads
 from checklists.daily_alive_check import daily_alive_check
+from ad_performance.refresh_rollup import refresh_job
 
 # Best Copies
 from best_copies.list_best import list_best_copies
@@ -60,9 +66,9 @@ from ai.analyze_copy_type import analyze_and_check
 from dashboard.get_summary import get_dashboard_summary
 
 # Ad Performance
-from ad_performance.get_meta_performance import get_performance_by_utm_codes
-from ad_performance.get_copy_type_performance import get_performance_by_copy_type
-from ad_performance.get_weekly_performance import get_weekly_team_performance
+from ad_performance.get_meta_performance import get_performance_by_utm_codes_async
+from ad_performance.get_copy_type_performance import get_performance_by_copy_type_async
+from ad_performance.get_weekly_performance import get_weekly_team_performance_async
 
 # Teams
 from teams.list_teams import list_teams
@@ -70,7 +76,7 @@ from teams.create_team import create_team
 from teams.delete_team import delete_team
 
 # Team Products
-from team_products.list_team_products import list_team_products
+from team_products.list_team_products import list_team_products, list_team_products_page
 from team_products.create_team_product import create_team_product
 from team_products.delete_team_product import delete_team_product
 from team_products.update_team_product import update_team_product
@@ -79,15 +85,30 @@ from team_products.update_team_product import update_team_product
 from user_preferences.get_preferences import get_preferences
 from user_preferences.update_preferences import update_preferences
 
+# DB
+from db import get_pool_stats, load_relationships
+from async_db import close_async_pool, get_async_pool_stats
+from query_stats import (
+    get_query_stats,
+    reset_query_endpoint,
+    reset_query_stats,
+    set_query_endpoint,
+    track_request_queries,
+)
+
 # Auth
 from auth.register import register_user
 from auth.login import login_user
 from auth.me import get_current_user
 from auth.approve import approve_user
-from auth.list_users import list_users
+from auth.list_users import list_users, list_users_page
 from auth.update_role import update_user_role
 from auth.update_user import update_user_name, reset_user_password
 
+# /page 엔드포인트 limit 상한 (keyset 페이지네이션을 우회하는 대량 조회 방지)
+MAX_PAGE_SIZE = 200
+# /api/admin/db-pool, /api/admin/query-stats 등록 여부 (SQL fingerprint·시간 노출, 기본 꺼짐)
+DB_ADMIN_API = os.environ.get("DB_ADMIN_API", "false").lower() in ("1", "true", "yes")
 
 app = FastAPI(
     title="Ad Copy Dashboard API",
@@ -103,6 +124,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def _route_label(request: Request) -> str:
+    """쿼리 통계용 엔드포인트 라벨 (경로 템플릿 기준, 예: "GET /api/copies/{copy_id}")"""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return f"{request.method} {getattr(route, 'path', request.url.path)}"
+    return f"{request.method} {request.url.path}"
+
+
+@app.middleware("http")
+async def track_query_endpoint(request: Request, call_next):
+    # 요청 처리 중 실행된 쿼리를 이 엔드포인트로 집계하고 Server-Timing 헤더로 노출
+    # (스트리밍 응답은 헤더 전송 이후 쿼리가 빠짐)
+    token = set_query_endpoint(_route_label(request))
+    try:
+        with track_request_queries() as queries:
+            response = await call_next(request)
+        response.headers["Server-Timing"] = queries.server_timing()
+        return response
+    finally:
+        reset_query_endpoint(token)
+
 # Daily alive check scheduler
 scheduler = BackgroundScheduler()
 scheduler.add_job(
@@ -112,9 +156,33 @@ scheduler.add_job(
     name="Daily UTM alive check",
     replace_existing=True
 )
+# 광고 성과 롤업: 원본이 바뀐 날짜만 다시 집계 (리포트는 최대 이 주기만큼 늦게 반영)
+scheduler.add_job(
+    refresh_job,
+    IntervalTrigger(minutes=int(os.environ.get("UTM_ROLLUP_REFRESH_MINUTES", "10"))),
+    id="refresh_utm_daily_rollup",
+    name="Refresh per-UTM daily rollup",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True,
+)
 scheduler.start()
 
 
+@app.on_event("startup")
+def warm_relationships():
+    """임베드 조인에 쓰는 FK 관계를 미리 캐시 (실패하면 첫 조인 쿼리 때 다시 시도)"""
+    try:
+        load_relationships()
+    except Exception as e:
+        print(f"FK relationship preload failed: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_async_pool():
+    await close_async_pool()
+
+
 def get_user_id_from_request(authorization: str = None) -> str | None:
     if not authorization or not authorization.startswith("Bearer "):
         return None
@@ -125,6 +193,86 @@ def get_user_id_from_request(authorization: str = None) -> str | None:
         return None
 
 
+def require_admin(authorization: str = Header(None)) -> dict:
+    """관리자 전용 엔드포인트 의존성: Bearer 토큰의 사용자가 admin이 아니면 401 / 403"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+    try:
+        user = get_current_user(authorization.replace("Bearer ", ""))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user
+
+
+def _json_default(value):
+    # orjson이 직접 처리하지 않는 타입 (datetime, date, UUID는 orjson이 ISO/문자열로 인코딩)
+    # FastAPI jsonable_encoder와 동일하게 Decimal은 정수/실수로 변환
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    return str(value)
+
+
+def dump_json(content) -> bytes:
+    return orjson.dumps(content, default=_json_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    DB 행을 한 번에 JSON bytes로 인코딩하는 응답
+    엔드포인트에서 직접 반환하면 FastAPI의 jsonable_encoder 순회를 건너뜀
+    (QueryBuilder.native_types()로 조회한 datetime 그대로의 행을 넘기면 serialize_row 순회도 생략)
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """응답이 끝나거나 클라이언트가 중간에 끊겨도 rows(QueryBuilder.stream() 등)를 닫아 DB 커넥션을 바로 반납"""
+
+    def __init__(self, content, rows, **kwargs):
+        super().__init__(content, **kwargs)
+        self.rows = rows
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            close = getattr(self.rows, "close", None)
+            if close is not None:
+                await run_in_threadpool(close)
+
+
+def json_array_response(rows, chunk_size: int = 65536) -> StreamingResponse:
+    """
+    행 iterator를 JSON 배열로 점진적으로 내려보냄 (전체 결과를 메모리에 올리지 않음)
+    첫 행은 응답 전에 가져오므로 쿼리 오류는 일반 500 응답으로 처리됨
+    QueryBuilder.stream()은 결과가 한 묶음(DB_STREAM_ITERSIZE) 이하면 이 시점에 커넥션을 이미 반납하고,
+    더 크면 전송이 끝나거나 연결이 끊길 때까지 커넥션을 점유 (동시 스트림 수는 DB_STREAM_MAX_CONCURRENT로 제한)
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+
+    def body():
+        if first is None:
+            yield b"[]"
+            return
+        buf = bytearray(b"[")
+        buf += dump_json(first)
+        for row in rows:
+            buf += b","
+            buf += dump_json(row)
+            if len(buf) >= chunk_size:
+                yield bytes(buf)
+                buf.clear()
+        buf += b"]"
+        yield bytes(buf)
+
+    return ClosingStreamingResponse(body(), rows, media_type="application/json")
+
+
 # ============================================
 # Pydantic Models
 # ============================================
@@ -287,7 +435,7 @@ class WeeklyPerformanceRequest(BaseModel):
 
 @app.get("/api/products")
 def api_list_products():
-    return list_products()
+    return FastJSONResponse(list_products())
 
 
 @app.get("/api/products/{id}")
@@ -382,7 +530,15 @@ def api_delete_copy_type(id: str, authorization: str = Header(None)):
 
 @app.get("/api/copies")
 def api_list_copies(product_id: Optional[str] = None, copy_type_id: Optional[str] = None):
-    return list_copies(product_id, copy_type_id)
+    return json_array_response(iter_copies(product_id, copy_type_id))
+
+
+@app.get("/api/copies/page")
+def api_list_copies_page(product_id: Optional[str] = None, copy_type_id: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_copies_page(product_id, copy_type_id, cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/copies/{id}")
@@ -428,7 +584,15 @@ def api_delete_copy(id: str, authorization: str = Header(None)):
 
 @app.get("/api/checklists")
 def api_list_checklists(week: Optional[str] = None, team_id: Optional[str] = None):
-    return list_checklists(week, team_id)
+    return FastJSONResponse(list_checklists(week, team_id))
+
+
+@app.get("/api/checklists/page")
+def api_list_checklists_page(week: Optional[str] = None, team_id: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_checklists_page(week, team_id, cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/checklists/init-week")
@@ -438,7 +602,15 @@ def api_init_week(week: Optional[str] = None):
 
 @app.get("/api/checklists/with-utm")
 def api_list_checklists_with_utm():
-    return list_checklists_with_utm()
+    return json_array_response(iter_checklists_with_utm())
+
+
+@app.get("/api/checklists/with-utm/page")
+def api_list_checklists_with_utm_page(cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_checklists_with_utm_page(cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/checklists/stats")
@@ -476,7 +648,7 @@ def api_update_checklist(id: str, data: ChecklistUpdate, authorization: str = He
 
 @app.get("/api/best-copies")
 def api_list_best_copies(month: Optional[str] = None):
-    return list_best_copies(month)
+    return FastJSONResponse(list_best_copies(month))
 
 
 @app.post("/api/best-copies", status_code=status.HTTP_201_CREATED)
@@ -497,7 +669,7 @@ def api_create_best_copy(data: BestCopyCreate, authorization: str = Header(None)
 
 @app.get("/api/teams")
 def api_list_teams():
-    return list_teams()
+    return FastJSONResponse(list_teams())
 
 
 @app.post("/api/teams", status_code=status.HTTP_201_CREATED)
@@ -520,7 +692,15 @@ def api_delete_team(id: str, authorization: str = Header(None)):
 
 @app.get("/api/team-products")
 def api_list_team_products(team_id: Optional[str] = None):
-    return list_team_products(team_id)
+    return FastJSONResponse(list_team_products(team_id))
+
+
+@app.get("/api/team-products/page")
+def api_list_team_products_page(team_id: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_team_products_page(team_id, cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/team-products", status_code=status.HTTP_201_CREATED)
@@ -573,7 +753,15 @@ def api_get_me(authorization: str = Header(None)):
 
 @app.get("/api/auth/users")
 def api_list_users():
-    return list_users()
+    return FastJSONResponse(list_users())
+
+
+@app.get("/api/auth/users/page")
+def api_list_users_page(cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_users_page(cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.put("/api/auth/approve/{id}")
@@ -620,19 +808,20 @@ def api_regenerate_copy(copy_id: str):
 # Ad Performance API
 # ============================================
 
+# 느린 리포트 쿼리는 async 풀에서 실행해 스레드풀(일반 CRUD 엔드포인트)을 점유하지 않음
 @app.post("/api/ad-performance/by-utm")
-def api_get_ad_performance(data: AdPerformanceRequest):
-    return get_performance_by_utm_codes(data.utm_codes, data.month)
+async def api_get_ad_performance(data: AdPerformanceRequest):
+    return await get_performance_by_utm_codes_async(data.utm_codes, data.month)
 
 
 @app.post("/api/ad-performance/copy-type")
-def api_get_copy_type_performance(data: CopyTypePerformanceRequest):
-    return get_performance_by_copy_type(data.month, data.team_id)
+async def api_get_copy_type_performance(data: CopyTypePerformanceRequest):
+    return await get_performance_by_copy_type_async(data.month, data.team_id)
 
 
 @app.post("/api/ad-performance/weekly-report")
-def api_get_weekly_performance(data: WeeklyPerformanceRequest):
-    return get_weekly_team_performance(data.start_week, data.end_week, data.team_ids)
+async def api_get_weekly_performance(data: WeeklyPerformanceRequest):
+    return await get_weekly_team_performance_async(data.start_week, data.end_week, data.team_ids)
 
 
 # ============================================
@@ -650,7 +839,15 @@ def api_dashboard_summary(week: Optional[str] = None):
 
 @app.get("/api/audit-logs")
 def api_list_audit_logs(table_name: Optional[str] = None, user_id: Optional[str] = None, limit: int = 100, offset: int = 0):
-    return list_audit_logs(table_name, user_id, limit, offset)
+    return FastJSONResponse(list_audit_logs(table_name, user_id, limit, offset))
+
+
+@app.get("/api/audit-logs/page")
+def api_list_audit_logs_page(table_name: Optional[str] = None, user_id: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        return FastJSONResponse(list_audit_logs_page(table_name, user_id, cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ============================================
@@ -673,6 +870,30 @@ def api_update_user_preferences(data: UserPreferencesUpdate, authorization: str
     return update_preferences(user_id, data.preferences)
 
 
+# ============================================
+# Admin API (DB_ADMIN_API=true일 때만 등록, admin 사용자만)
+# ============================================
+
+if DB_ADMIN_API:
+    @app.get("/api/admin/db-pool", dependencies=[Depends(require_admin)])
+    def api_get_db_pool_stats():
+        """DB 커넥션 풀 상태 (size / idle / in_use / 대기·타임아웃 횟수), async 풀은 "async" 키"""
+        return {**get_pool_stats(), "async": get_async_pool_stats()}
+
+    @app.get("/api/admin/query-stats", dependencies=[Depends(require_admin)])
+    def api_get_query_stats(sort: str = "total_ms", limit: int = 50):
+        """SQL fingerprint별 호출 수 / 시간 히스토그램 / 행 수 / 재시도 / 엔드포인트"""
+        try:
+            return get_query_stats(sort, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.delete("/api/admin/query-stats", dependencies=[Depends(require_admin)])
+    def api_reset_query_stats():
+        reset_query_stats()
+        return {"success": True}
+
+
 # ============================================
 # Static File Serving (Production)
 # ============================================
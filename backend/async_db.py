@@ -0,0 +1,233 @@
+"""
+async PostgreSQL 클라이언트 (psycopg 3 + psycopg_pool)
+db.PostgresClient와 같은 fluent API. SQL 생성은 db.QueryBuilder의 쿼리 플랜을 그대로 실행
+async def 엔드포인트에서 스레드풀 스레드를 점유하지 않고 DB를 기다릴 때 사용
+"""
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg.types.string import TextLoader
+from psycopg_pool import AsyncConnectionPool
+
+from db import (
+    POOL_IDLE_CHECK_SECONDS,
+    POOL_MAX_SIZE,
+    POOL_MIN_SIZE,
+    POOL_TIMEOUT,
+    POOL_VALIDATE,
+    PREPARE_THRESHOLD,
+    PREPARED_MAX,
+    STREAM_ITERSIZE,
+    QueryBuilder,
+    _drop_columns,
+    serialize_row,
+)
+from query_stats import record_query
+
+# async 풀 설정 (동기 풀과 별도. 기본값은 동기 풀과 같음)
+ASYNC_POOL_MIN_SIZE = int(os.environ.get("DB_ASYNC_POOL_MIN", POOL_MIN_SIZE))
+ASYNC_POOL_MAX_SIZE = int(os.environ.get("DB_ASYNC_POOL_MAX", POOL_MAX_SIZE))
+
+_async_pool = None
+_async_pool_lock = asyncio.Lock()
+# 커넥션별 마지막 반납 시각 (DB_POOL_VALIDATE=idle 검증용)
+_returned_at = weakref.WeakKeyDictionary()
+
+
+async def _configure_connection(conn):
+    """새 커넥션 설정 + 스키마 설정 (물리 커넥션당 1회)"""
+    await conn.set_autocommit(True)
+    # psycopg2와 같은 결과 타입을 위해 uuid는 문자열로 읽음
+    conn.adapters.register_loader("uuid", TextLoader)
+    # psycopg 3는 자체적으로 prepared statement를 관리하므로 동기 풀과 같은 한도만 맞춤
+    if PREPARED_MAX > 0:
+        conn.prepared_max = PREPARED_MAX
+        conn.prepare_threshold = PREPARE_THRESHOLD
+    else:
+        conn.prepare_threshold = None
+    schema = os.environ.get("DB_SCHEMA", "public")
+    await conn.execute(f'SET search_path TO "{schema}"')
+
+
+async def _mark_returned(conn):
+    """풀 반납 시 시각 기록 (reset 콜백)"""
+    _returned_at[conn] = time.monotonic()
+
+
+async def _check_idle_connection(conn):
+    """DB_POOL_VALIDATE=idle: 동기 풀처럼 DB_POOL_IDLE_CHECK_SECONDS 이상 쉬었던 커넥션만 ping"""
+    returned = _returned_at.get(conn)
+    if returned is not None and time.monotonic() - returned >= POOL_IDLE_CHECK_SECONDS:
+        await AsyncConnectionPool.check_connection(conn)
+
+
+def _pool_check():
+    if POOL_VALIDATE == "always":
+        return AsyncConnectionPool.check_connection
+    if POOL_VALIDATE == "idle":
+        return _check_idle_connection
+    return None
+
+
+async def get_async_pool():
+    """async 커넥션 풀 (첫 호출 때 생성, 이벤트 루프당 하나)"""
+    global _async_pool
+    if _async_pool is None:
+        async with _async_pool_lock:
+            if _async_pool is None:
+                conninfo = make_conninfo(
+                    host=os.environ["DB_HOST"],
+                    port=os.environ["DB_PORT"],
+                    dbname=os.environ["DB_NAME"],
+                    user=os.environ["DB_USER"],
+                    password=os.environ["DB_PASSWORD"],
+                )
+                pool = AsyncConnectionPool(
+                    conninfo,
+                    min_size=ASYNC_POOL_MIN_SIZE,
+                    max_size=ASYNC_POOL_MAX_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    configure=_configure_connection,
+                    # 대여할 때 커넥션 검증 (DB_POOL_VALIDATE 정책, db.ConnectionPool과 같음)
+                    check=_pool_check(),
+                    reset=_mark_returned,
+                    name="async",
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_pool_stats():
+    """async 풀 상태 (아직 열리지 않았으면 None)"""
+    if _async_pool is None:
+        return None
+    stats = _async_pool.get_stats()
+    return {
+        "min_size": ASYNC_POOL_MIN_SIZE,
+        "max_size": ASYNC_POOL_MAX_SIZE,
+        "size": stats.get("pool_size", 0),
+        "idle": stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "total_requests": stats.get("requests_num", 0),
+        "total_timeouts": stats.get("requests_errors", 0),
+    }
+
+
+@asynccontextmanager
+async def async_pooled_connection():
+    """
+    async 풀에서 커넥션을 빌려 쓰고 반납 (autocommit)
+    async with async_pooled_connection() as conn: ...
+    """
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def run_plan_async(plan, cur=None, retries=0):
+    """
+    db.run_plan의 async 버전. 같은 쿼리 플랜을 async 커서로 실행
+    cur가 없으면 async 풀 커넥션의 기본(tuple) 커서로 실행. 문장마다 query_stats에 기록
+    """
+    if cur is None:
+        async with async_pooled_connection() as conn:
+            async with conn.cursor() as own_cur:
+                return await run_plan_async(plan, own_cur, retries)
+    try:
+        sql, params = next(plan)
+    except StopIteration as stop:
+        return stop.value
+    while True:
+        started = time.perf_counter()
+        await cur.execute(sql, params)
+        rows = await cur.fetchall() if cur.description is not None else None
+        record_query(sql, time.perf_counter() - started, len(rows) if rows is not None else cur.rowcount, retries)
+        try:
+            sql, params = plan.send(rows)
+        except StopIteration as stop:
+            return stop.value
+
+
+class AsyncQueryBuilder(QueryBuilder):
+    """QueryBuilder와 같은 fluent API. execute()는 await, stream()은 async for로 사용"""
+
+    async def execute(self):
+        return await self._execute_with_retry()
+
+    async def stream(self, itersize=STREAM_ITERSIZE):
+        """QueryBuilder.stream의 async 버전 (async for row in builder.stream())"""
+        if self._operation != "select" or self._aggregates or self._single:
+            raise ValueError("stream() supports plain select queries only")
+        async with async_pooled_connection() as conn:
+            # 서버 사이드 커서는 트랜잭션 안에서만 동작
+            async with conn.transaction():
+                join_cur = conn.cursor(row_factory=dict_row)
+                if self._joins:
+                    await run_plan_async(self._resolve_joins_plan(), join_cur)
+                sql, params = self._select_sql()
+                hidden = self._projection()[1]
+                # 청크가 바뀌어도 이미 읽은 조인 행은 재사용
+                join_cache = {}
+                async with conn.cursor(name=f"qb_stream_{id(self):x}", row_factory=dict_row) as cur:
+                    # 계측은 소비자 처리 시간을 빼고 DB 대기 시간만 합산해 순회 끝에 1회 기록
+                    started = time.perf_counter()
+                    await cur.execute(sql, params)
+                    db_time = time.perf_counter() - started
+                    row_count = 0
+                    while True:
+                        started = time.perf_counter()
+                        rows = await cur.fetchmany(itersize)
+                        db_time += time.perf_counter() - started
+                        if not rows:
+                            break
+                        row_count += len(rows)
+                        chunk = [dict(row) for row in rows]
+                        if self._joins:
+                            await run_plan_async(self._embeds_plan(chunk, self._joins, join_cache), join_cur)
+                        _drop_columns(chunk, hidden)
+                        for row in chunk:
+                            yield serialize_row(row) if self._serialize else row
+                    record_query(sql, db_time, row_count)
+                await join_cur.close()
+
+    async def _execute_with_retry(self, _retried=False):
+        try:
+            async with async_pooled_connection() as conn:
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    return await run_plan_async(self._plan(), cur, retries=1 if _retried else 0)
+        except psycopg.OperationalError:
+            # 끊긴 커넥션은 풀이 반납 시점에 버림. 재시도 때는 새로 검증된 커넥션을 받음
+            if not _retried:
+                return await self._execute_with_retry(_retried=True)
+            raise
+
+
+class AsyncPostgresClient:
+    def table(self, table_name):
+        return AsyncQueryBuilder(table_name)
+
+
+# 싱글톤 클라이언트
+_client = None
+
+
+def get_async_db_client():
+    global _client
+    if _client is None:
+        _client = AsyncPostgresClient()
+    return _client
@@ -2,18 +2,28 @@ import argparse
 from db import get_db_client
 
 
-def list_audit_logs(table_name=None, user_id=None, limit=100, offset=0):
+def _audit_logs_query(table_name=None, user_id=None):
     client = get_db_client()
     query = client.table("audit_logs").select("*")
     if table_name:
         query = query.eq("table_name", table_name)
     if user_id:
         query = query.eq("user_id", user_id)
-    query = query.order("created_at", desc=True).limit(limit)
+    return query.native_types()
+
+
+def list_audit_logs(table_name=None, user_id=None, limit=100, offset=0):
+    query = _audit_logs_query(table_name, user_id).order("created_at", desc=True).range(offset, offset + limit - 1)
     result = query.execute()
     return result.data
 
 
+def list_audit_logs_page(table_name=None, user_id=None, cursor=None, limit=100):
+    """created_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    result = _audit_logs_query(table_name, user_id).paginate(cursor, limit).execute()
+    return {"data": result.data, "next_cursor": result.next_cursor}
+
+
 def main(table_name, user_id, limit):
     logs = list_audit_logs(table_name, user_id, limit)
     for log in logs:
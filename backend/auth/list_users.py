@@ -8,10 +8,17 @@ from conn import get_supabase_client
 
 def list_users():
     client = get_supabase_client()
-    response = client.table("users").select("*, teams(*)").order("created_at", desc=True).execute()
+    response = client.table("users").select("*, teams(id, name)").order("created_at", desc=True).execute()
     return response.data
 
 
+def list_users_page(cursor: str = None, limit: int = 50):
+    """created_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    client = get_supabase_client()
+    response = client.table("users").select("*, teams(id, name)").paginate(cursor, limit).execute()
+    return {"data": response.data, "next_cursor": response.next_cursor}
+
+
 def main():
     users = list_users()
     print(json.dumps(users, indent=2, ensure_ascii=False))
@@ -4,13 +4,11 @@ from datetime import datetime, timedelta
 
 sys.path.insert(0, sys.path[0] + "/..")
 
-from db import get_connection
+from db import fetch_all
+from ad_performance.utm import UTM_ROLLUP_TABLE, normalize_utm_code, utm_match
 
 
 def check_alive_ads(utm_codes: list[str], week: str = None) -> dict:
-    conn = get_connection()
-    cur = conn.cursor()
-
     if week:
         monday = datetime.strptime(week + "-1", "%G-W%V-%u")
     else:
@@ -21,41 +19,34 @@ def check_alive_ads(utm_codes: list[str], week: str = None) -> dict:
     sunday_str = sunday.strftime("%Y-%m-%d")
     monday_str = monday.strftime("%Y-%m-%d")
 
-    placeholders = ",".join(["%s"] * len(utm_codes))
+    match, utm_params = utm_match(utm_codes)
 
     # Query spend for Sunday and Monday separately per utm_code
     sql = f"""
         SELECT
-            regexp_replace(ad_code, '^\\[[^]]*\\]', '') AS utm_code,
+            utm_code,
             date,
-            COALESCE(SUM(spend), 0) AS daily_spend
-        FROM ad_performance.meta_daily_perform
-        WHERE regexp_replace(ad_code, '^\\[[^]]*\\]', '') IN ({placeholders})
+            spend AS daily_spend
+        FROM {UTM_ROLLUP_TABLE}
+        WHERE {match}
           AND date IN (%s, %s)
-        GROUP BY regexp_replace(ad_code, '^\\[[^]]*\\]', ''), date
     """
 
-    params = utm_codes + [sunday_str, monday_str]
-    cur.execute(sql, params)
-
-    columns = [desc[0] for desc in cur.description]
-    rows = cur.fetchall()
-    cur.close()
+    params = utm_params + [sunday_str, monday_str]
+    rows = fetch_all(sql, params)
 
     # Build per-utm spend data for each day
     spend_by_utm = {}
-    for row in rows:
-        row_dict = dict(zip(columns, row))
-        utm = row_dict["utm_code"]
-        date_str = str(row_dict["date"])
-        daily_spend = float(row_dict["daily_spend"])
+    for utm, date, daily_spend in rows:
+        date_str = str(date)
+        daily_spend = float(daily_spend)
         if utm not in spend_by_utm:
             spend_by_utm[utm] = {}
         spend_by_utm[utm][date_str] = daily_spend
 
     result = {}
     for utm in utm_codes:
-        utm_data = spend_by_utm.get(utm, {})
+        utm_data = spend_by_utm.get(normalize_utm_code(utm), {})
         sunday_spend = utm_data.get(sunday_str, 0)
         monday_spend = utm_data.get(monday_str, 0)
         alive = sunday_spend > 0 or monday_spend > 0
@@ -7,72 +7,40 @@ from zoneinfo import ZoneInfo
 sys.path.insert(0, sys.path[0] + "/..")
 
 from conn import get_supabase_client
-from db import get_connection
+from db import fetch_all
+from ad_performance.utm import UTM_SPEND_STATE_TABLE, by_requested_code, utm_match
+from ad_performance.refresh_rollup import refresh_utm_daily_rollup
+from checklists.utm_codes import execute_with_utm_codes, get_week_utm_codes
 
 
 def get_week_string(dt: datetime) -> str:
     return dt.strftime("%G-W%V")
 
 
-def parse_utm_codes(utm_code_raw) -> list[str]:
-    if not utm_code_raw:
-        return []
-    if isinstance(utm_code_raw, str):
-        utm_code_raw = utm_code_raw.strip()
-        if not utm_code_raw or utm_code_raw == "[]":
-            return []
-        codes = json.loads(utm_code_raw)
-    else:
-        codes = utm_code_raw
-    if not isinstance(codes, list):
-        codes = [codes]
-    return [c for c in codes if c]
-
-
-def query_yesterday_spend(utm_codes: list[str], yesterday_str: str) -> dict[str, float]:
-    conn = get_connection()
-    cur = conn.cursor()
-
-    placeholders = ",".join(["%s"] * len(utm_codes))
-    sql = f"""
-        SELECT regexp_replace(ad_code, '^\\[[^]]*\\]', '') AS utm_code,
-               COALESCE(SUM(spend), 0) AS daily_spend
-        FROM ad_performance.meta_daily_perform
-        WHERE regexp_replace(ad_code, '^\\[[^]]*\\]', '') IN ({placeholders})
-          AND date = %s
-        GROUP BY regexp_replace(ad_code, '^\\[[^]]*\\]', '')
+def query_spend_state(utm_codes: list[str]) -> dict[str, dict]:
     """
+    UTM 코드별 광고비 소진 상태 {utm_code: {first_spend_date, last_spend_date, lifetime_spend}}
+    utm_spend_state(롤업 갱신 때 바뀐 날짜분만 반영)에서 조회하므로 광고 이력 길이와 무관. 상태가 없는 코드는 제외
+    """
+    match, utm_params = utm_match(utm_codes)
+    rows = fetch_all(
+        f"""
+        SELECT utm_code, first_spend_date, last_spend_date, lifetime_spend
+        FROM {UTM_SPEND_STATE_TABLE}
+        WHERE {match}
+        """,
+        utm_params,
+    )
 
-    params = utm_codes + [yesterday_str]
-    cur.execute(sql, params)
-
-    columns = [desc[0] for desc in cur.description]
-    rows = cur.fetchall()
-    cur.close()
-
-    spend_map = {}
-    for row in rows:
-        row_dict = dict(zip(columns, row))
-        spend_map[row_dict["utm_code"]] = float(row_dict["daily_spend"])
-
-    return spend_map
-
+    state_map = {}
+    for utm_code, first_spend_date, last_spend_date, lifetime_spend in rows:
+        state_map[utm_code] = {
+            "first_spend_date": first_spend_date,
+            "last_spend_date": last_spend_date,
+            "lifetime_spend": float(lifetime_spend),
+        }
 
-def query_ever_spent(utm_codes: list[str]) -> set[str]:
-    """해당 UTM 코드들 중 과거 광고비 소진 이력이 있는 것만 반환"""
-    conn = get_connection()
-    cur = conn.cursor()
-    placeholders = ",".join(["%s"] * len(utm_codes))
-    sql = f"""
-        SELECT DISTINCT regexp_replace(ad_code, '^\\[[^]]*\\]', '') AS utm_code
-        FROM ad_performance.meta_daily_perform
-        WHERE regexp_replace(ad_code, '^\\[[^]]*\\]', '') IN ({placeholders})
-          AND spend > 0
-    """
-    cur.execute(sql, utm_codes)
-    result = {row[0] for row in cur.fetchall()}
-    cur.close()
-    return result
+    return by_requested_code(utm_codes, state_map)
 
 
 def daily_alive_check() -> dict:
@@ -87,34 +55,41 @@ def daily_alive_check() -> dict:
 
     print(f"[daily_alive_check] Running for yesterday={yesterday_str}, current_week={current_week}, previous_week={previous_week}")
 
+    # 어제 광고비가 롤업과 소진 상태에 반영되도록 바뀐 날짜를 먼저 다시 집계
+    refreshed = refresh_utm_daily_rollup()
+    print(f"[daily_alive_check] Refreshed {refreshed} rollup dates")
+
     client = get_supabase_client()
 
-    # Get current week checklists with UTM codes
+    # Get current week checklists; UTM codes per checklist come from checklist_utm_codes
     current_checklists = (
         client.table("checklists")
-        .select("id, product_id, copy_type_id, team_id, utm_code, status, notes")
+        .select("id, product_id, copy_type_id, team_id, status, notes")
         .eq("week", current_week)
         .execute()
         .data
     )
-    current_with_utm = [c for c in current_checklists if parse_utm_codes(c.get("utm_code"))]
+    current_codes = get_week_utm_codes(current_week)
+    current_with_utm = [c for c in current_checklists if str(c["id"]) in current_codes]
 
     # Get previous week checklists with UTM codes (for re-activation pool)
-    prev_checklists = (
-        client.table("checklists")
-        .select("id, product_id, copy_type_id, team_id, utm_code")
-        .eq("week", previous_week)
-        .execute()
-        .data
-    )
-    prev_with_utm = [c for c in prev_checklists if parse_utm_codes(c.get("utm_code"))]
+    prev_codes = get_week_utm_codes(previous_week)
+    prev_with_utm = []
+    if prev_codes:
+        prev_with_utm = (
+            client.table("checklists")
+            .select("id, product_id, copy_type_id, team_id")
+            .in_("id", list(prev_codes))
+            .execute()
+            .data
+        )
 
     # Collect ALL unique UTM codes from both weeks
     all_utm_codes = set()
-    for c in current_with_utm:
-        all_utm_codes.update(parse_utm_codes(c.get("utm_code")))
-    for c in prev_with_utm:
-        all_utm_codes.update(parse_utm_codes(c.get("utm_code")))
+    for codes in current_codes.values():
+        all_utm_codes.update(codes)
+    for codes in prev_codes.values():
+        all_utm_codes.update(codes)
 
     if not all_utm_codes:
         print("[daily_alive_check] No UTM codes found in current or previous week checklists")
@@ -122,45 +97,35 @@ def daily_alive_check() -> dict:
 
     print(f"[daily_alive_check] Checking {len(all_utm_codes)} unique UTM codes")
 
-    # Query yesterday's spend
-    spend_map = query_yesterday_spend(list(all_utm_codes), yesterday_str)
-
-    alive_utms = {utm for utm, spend in spend_map.items() if spend > 0}
+    # 소진 상태로 분류: 어제(이후) 소진 -> alive, 소진 이력 있음 -> 제거 대상, 이력 없음 -> 신규(보호)
+    spend_state = query_spend_state(list(all_utm_codes))
+    yesterday = yesterday_kst.date()
+    alive_utms = {
+        utm for utm, state in spend_state.items()
+        if state["last_spend_date"] is not None and state["last_spend_date"] >= yesterday
+    }
+    ever_spent = {utm for utm, state in spend_state.items() if state["first_spend_date"] is not None}
     dead_utms = all_utm_codes - alive_utms
     print(f"[daily_alive_check] Alive: {len(alive_utms)}, Dead: {len(dead_utms)}")
 
-    # Build set of all UTMs currently assigned in current week
-    current_utm_set = set()
-    for c in current_with_utm:
-        current_utm_set.update(parse_utm_codes(c.get("utm_code")))
-
-    # Build triple-to-checklist mapping for current week (all checklists, not just those with UTMs)
-    current_by_triple = {}
-    for c in current_checklists:
-        triple = (c["product_id"], c["copy_type_id"], c["team_id"])
-        current_by_triple[triple] = c
-
     removed_count = 0
     reactivated_count = 0
     details = []
 
     # Step 1: Remove dead UTMs from current week checklists
-    # First pass: collect all dead codes across all checklists
-    all_dead_codes = set()
+    # First pass: split each checklist's codes into alive / dead
     checklist_code_map = []  # [(checklist, alive_codes, dead_codes), ...]
     for c in current_with_utm:
-        codes = parse_utm_codes(c.get("utm_code"))
+        codes = current_codes[str(c["id"])]
         alive_codes = [code for code in codes if code in alive_utms]
         dead_codes = [code for code in codes if code not in alive_utms]
         if dead_codes:
             checklist_code_map.append((c, alive_codes, dead_codes))
-            all_dead_codes.update(dead_codes)
 
-    # Check historical spend for all dead codes at once
-    ever_spent = query_ever_spent(list(all_dead_codes)) if all_dead_codes else set()
     preserved_count = 0
 
     # Second pass: only remove truly dead codes (had spend before)
+    removal_updates = []
     for c, alive_codes, dead_codes in checklist_code_map:
         truly_dead = [code for code in dead_codes if code in ever_spent]
         new_codes = [code for code in dead_codes if code not in ever_spent]  # 신규 등록, 보호
@@ -173,11 +138,11 @@ def daily_alive_check() -> dict:
             remaining = alive_codes + new_codes  # alive + 신규는 유지
             removed_count += len(truly_dead)
             new_utm = json.dumps(remaining) if remaining else None
-            data = {
+            removal_updates.append({
+                "id": c["id"],
                 "utm_code": new_utm,
                 "updated_at": datetime.now(timezone.utc).isoformat(),
-            }
-            client.table("checklists").update(data).eq("id", c["id"]).execute()
+            })
 
             detail = {
                 "checklist_id": c["id"],
@@ -189,45 +154,44 @@ def daily_alive_check() -> dict:
             details.append(detail)
             print(f"  [remove] Checklist {c['id']}: removed {truly_dead}, preserved_new {new_codes}, remaining {remaining}")
 
+    # 제거 대상 체크리스트를 한 번에 업데이트
+    if removal_updates:
+        execute_with_utm_codes(client.table("checklists").update_many(removal_updates))
+
     # Step 2: Re-activate alive UTMs from previous week
-    # Rebuild current_utm_set after removals
-    updated_current = (
-        client.table("checklists")
-        .select("id, product_id, copy_type_id, team_id, utm_code")
-        .eq("week", current_week)
-        .execute()
-        .data
-    )
+    # Rebuild current week UTM codes after removals
+    current_codes_after = get_week_utm_codes(current_week)
     current_utm_set_after = set()
-    for c in updated_current:
-        current_utm_set_after.update(parse_utm_codes(c.get("utm_code")))
-    # Rebuild triple mapping after removals
+    for codes in current_codes_after.values():
+        current_utm_set_after.update(codes)
+    # Triple-to-checklist mapping for current week (all checklists, not just those with UTMs)
     current_by_triple_after = {}
-    for c in updated_current:
+    for c in current_checklists:
         triple = (c["product_id"], c["copy_type_id"], c["team_id"])
         current_by_triple_after[triple] = c
 
+    reactivation_updates = {}
     for c in prev_with_utm:
-        codes = parse_utm_codes(c.get("utm_code"))
+        codes = prev_codes[str(c["id"])]
         for code in codes:
             if code in alive_utms and code not in current_utm_set_after:
                 # Find matching current week checklist by triple
                 triple = (c["product_id"], c["copy_type_id"], c["team_id"])
                 target = current_by_triple_after.get(triple)
                 if target:
-                    existing_codes = parse_utm_codes(target.get("utm_code"))
+                    existing_codes = current_codes_after.setdefault(str(target["id"]), [])
                     existing_codes.append(code)
-                    data = {
+                    # 같은 체크리스트에 여러 코드가 붙으면 마지막(누적된) 값만 반영됨
+                    reactivation_updates[target["id"]] = {
+                        "id": target["id"],
                         "utm_code": json.dumps(existing_codes),
                         "status": "completed",
                         "notes": "auto-carry",
                         "updated_at": datetime.now(timezone.utc).isoformat(),
                     }
-                    client.table("checklists").update(data).eq("id", target["id"]).execute()
 
                     # Update local tracking
                     current_utm_set_after.add(code)
-                    target["utm_code"] = json.dumps(existing_codes)
 
                     reactivated_count += 1
                     detail = {
@@ -239,6 +203,9 @@ def daily_alive_check() -> dict:
                     details.append(detail)
                     print(f"  [reactivate] UTM {code} -> Checklist {target['id']} (triple={triple})")
 
+    if reactivation_updates:
+        execute_with_utm_codes(client.table("checklists").update_many(list(reactivation_updates.values())))
+
     summary = {
         "date": yesterday_str,
         "current_week": current_week,
@@ -7,15 +7,16 @@ from conn import get_supabase_client
 
 def get_checklist_stats(team_id: str = None):
     client = get_supabase_client()
-    query = client.table("checklists").select("status")
+    # 상태별 개수만 DB에서 집계
+    query = client.table("checklists").select("status, count()")
     if team_id:
         query = query.eq("team_id", team_id)
     response = query.execute()
-    data = response.data
-    total = len(data)
-    completed = len([d for d in data if d["status"] == "completed"])
-    in_progress = len([d for d in data if d["status"] == "in_progress"])
-    pending = len([d for d in data if d["status"] == "pending"])
+    counts = {row["status"]: row["count"] for row in response.data}
+    total = sum(counts.values())
+    completed = counts.get("completed", 0)
+    in_progress = counts.get("in_progress", 0)
+    pending = counts.get("pending", 0)
     return {
         "total": total,
         "completed": completed,
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 sys.path.insert(0, sys.path[0] + "/..")
 
 from conn import get_supabase_client
+from checklists.utm_codes import execute_with_utm_codes, get_week_utm_codes
 
 
 def get_current_week() -> str:
@@ -29,61 +30,56 @@ def init_week_checklists(week: str = None):
     team_products = client.table("team_products").select("team_id, product_id").eq("active", True).execute().data
     copy_types = client.table("copy_types").select("id").is_("parent_id", None).execute().data
 
-    # 기존 체크리스트 조회
-    existing = client.table("checklists").select("product_id, copy_type_id, team_id").eq("week", week).execute().data
-    existing_triples = {(item["product_id"], item["copy_type_id"], item["team_id"]) for item in existing}
-
-    # 이전 주차 체크리스트에서 UTM 코드가 있는 항목 조회
+    # 이전 주차 체크리스트의 UTM 코드 수집 (checklist_utm_codes, 등록 순서)
     prev_week = get_previous_week(week)
-    prev_checklists = (
-        client.table("checklists")
-        .select("product_id, copy_type_id, team_id, utm_code")
-        .eq("week", prev_week)
-        .neq("utm_code", "")
-        .neq("utm_code", "[]")
-        .execute()
-        .data
-    )
-    prev_checklists = [item for item in prev_checklists if item.get("utm_code")]
-
-    # 이전 주차의 UTM 코드 수집
+    prev_codes = get_week_utm_codes(prev_week)
+    prev_checklists = []
+    if prev_codes:
+        prev_checklists = (
+            client.table("checklists")
+            .select("id, product_id, copy_type_id, team_id")
+            .in_("id", list(prev_codes))
+            .execute()
+            .data
+        )
+
     prev_by_triple = {}
     for item in prev_checklists:
-        utm_code_raw = item["utm_code"]
-        codes = json.loads(utm_code_raw) if isinstance(utm_code_raw, str) else utm_code_raw
-        if not isinstance(codes, list):
-            codes = [codes]
         triple = (item["product_id"], item["copy_type_id"], item["team_id"])
-        prev_by_triple[triple] = {"utm_code": utm_code_raw, "codes": codes}
+        prev_by_triple[triple] = {"codes": prev_codes[str(item["id"])]}
 
-    # 누락된 조합만 생성
+    # 전체 조합을 보내고 이미 있는 조합은 DB에서 무시 (동시 실행에도 중복 생성 없음)
     new_checklists = []
     for tp in team_products:
         for copy_type in copy_types:
             triple = (tp["product_id"], copy_type["id"], tp["team_id"])
-            if triple not in existing_triples:
-                entry = {
-                    "product_id": tp["product_id"],
-                    "copy_type_id": copy_type["id"],
-                    "team_id": tp["team_id"],
-                    "status": "pending",
-                    "week": week,
-                    "utm_code": None,
-                    "notes": None
-                }
-                # Auto-carry: 이전 주차의 UTM 코드 전부 이월
-                if triple in prev_by_triple:
-                    prev = prev_by_triple[triple]
-                    if prev["codes"]:
-                        entry["utm_code"] = json.dumps(prev["codes"])
-                        entry["status"] = "completed"
-                        entry["notes"] = "auto-carry"
-                new_checklists.append(entry)
+            entry = {
+                "product_id": tp["product_id"],
+                "copy_type_id": copy_type["id"],
+                "team_id": tp["team_id"],
+                "status": "pending",
+                "week": week,
+                "utm_code": None,
+                "notes": None
+            }
+            # Auto-carry: 이전 주차의 UTM 코드 전부 이월
+            if triple in prev_by_triple:
+                prev = prev_by_triple[triple]
+                if prev["codes"]:
+                    entry["utm_code"] = json.dumps(prev["codes"])
+                    entry["status"] = "completed"
+                    entry["notes"] = "auto-carry"
+            new_checklists.append(entry)
 
     if new_checklists:
-        response = client.table("checklists").insert(new_checklists).execute()
-        print(f"Created {len(response.data)} new checklists for week {week}")
-        return response.data
+        # 이월된 UTM 코드는 checklist_utm_codes에도 같은 트랜잭션에서 기록
+        response = execute_with_utm_codes(
+            client.table("checklists")
+            .upsert(new_checklists, on_conflict=["product_id", "copy_type_id", "week", "team_id"], ignore_duplicates=True)
+        )
+        if response.data:
+            print(f"Created {len(response.data)} new checklists for week {week}")
+            return response.data
 
     print(f"No new checklists needed for week {week}")
     return []
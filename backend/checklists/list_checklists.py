@@ -5,18 +5,27 @@ sys.path.insert(0, sys.path[0] + "/..")
 from conn import get_supabase_client
 
 
-def list_checklists(week: str = None, team_id: str = None):
+def _checklists_query(week: str = None, team_id: str = None):
     client = get_supabase_client()
-    query = client.table("checklists").select("*, products(*), copy_types(*)")
+    query = client.table("checklists").select("*, products(id, name), copy_types(id, code, name)")
     if week:
         query = query.eq("week", week)
     if team_id:
         query = query.eq("team_id", team_id)
+    return query.native_types()
+
 
-    response = query.execute()
+def list_checklists(week: str = None, team_id: str = None):
+    response = _checklists_query(week, team_id).execute()
     return response.data
 
 
+def list_checklists_page(week: str = None, team_id: str = None, cursor: str = None, limit: int = 50):
+    """created_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    response = _checklists_query(week, team_id).paginate(cursor, limit).execute()
+    return {"data": response.data, "next_cursor": response.next_cursor}
+
+
 def main(week: str = None, team_id: str = None):
     result = list_checklists(week, team_id)
     print(f"Found {len(result)} checklists")
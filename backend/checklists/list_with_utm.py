@@ -2,53 +2,34 @@ import argparse
 import sys
 sys.path.insert(0, sys.path[0] + "/..")
 
-from db import get_connection, serialize_row
-import psycopg2.extras
+from conn import get_supabase_client
+
+
+def _checklists_with_utm_query():
+    client = get_supabase_client()
+    # neq는 NULL도 걸러냄 (utm_code IS NOT NULL 포함)
+    return (
+        client.table("checklists")
+        .select("*, products(id, name), copy_types(id, code, name)")
+        .neq("utm_code", "")
+        .neq("utm_code", "[]")
+        .native_types()
+    )
 
 
 def list_checklists_with_utm():
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    try:
-        # Step 1: Get filtered checklists
-        cur.execute("""
-            SELECT * FROM checklists
-            WHERE utm_code IS NOT NULL
-              AND utm_code != ''
-              AND utm_code != '[]'
-            ORDER BY updated_at DESC
-        """)
-        rows = [dict(row) for row in cur.fetchall()]
-
-        if not rows:
-            return []
-
-        # Step 2: Batch fetch products
-        product_ids = list(set(r["product_id"] for r in rows if r.get("product_id")))
-        if product_ids:
-            placeholders = ",".join(["%s"] * len(product_ids))
-            cur.execute(f'SELECT * FROM products WHERE id IN ({placeholders})', product_ids)
-            products_map = {row["id"]: dict(row) for row in cur.fetchall()}
-        else:
-            products_map = {}
-
-        # Step 3: Batch fetch copy_types
-        ct_ids = list(set(r["copy_type_id"] for r in rows if r.get("copy_type_id")))
-        if ct_ids:
-            placeholders = ",".join(["%s"] * len(ct_ids))
-            cur.execute(f'SELECT * FROM copy_types WHERE id IN ({placeholders})', ct_ids)
-            ct_map = {row["id"]: dict(row) for row in cur.fetchall()}
-        else:
-            ct_map = {}
-
-        # Step 4: Merge
-        for row in rows:
-            row["product"] = products_map.get(row.get("product_id"))
-            row["copy_type"] = ct_map.get(row.get("copy_type_id"))
-
-        return [serialize_row(row) for row in rows]
-    finally:
-        cur.close()
+    return _checklists_with_utm_query().order("updated_at", desc=True).execute().data
+
+
+def list_checklists_with_utm_page(cursor: str = None, limit: int = 50):
+    """updated_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    response = _checklists_with_utm_query().paginate(cursor, limit, columns=("updated_at", "id")).execute()
+    return {"data": response.data, "next_cursor": response.next_cursor}
+
+
+def iter_checklists_with_utm():
+    """list_checklists_with_utm과 같은 결과를 서버 사이드 커서로 한 행씩 반환"""
+    return _checklists_with_utm_query().order("updated_at", desc=True).stream()
 
 
 def main():
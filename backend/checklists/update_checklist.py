@@ -5,12 +5,15 @@ from datetime import datetime, timezone
 sys.path.insert(0, "/Users/las/Development/project/ad-copy-dashboard/backend")
 
 from conn import get_supabase_client
+from checklists.utm_codes import execute_with_utm_codes
 
 
 def update_checklist(checklist_id: str, data: dict):
     client = get_supabase_client()
     data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    response = client.table("checklists").update(data).eq("id", checklist_id).execute()
+    query = client.table("checklists").update(data).eq("id", checklist_id)
+    # utm_code가 바뀌면 checklist_utm_codes도 같은 트랜잭션에서 교체
+    response = execute_with_utm_codes(query) if "utm_code" in data else query.execute()
     return response.data[0]
 
 
@@ -0,0 +1,167 @@
+import argparse
+import json
+import sys
+
+sys.path.insert(0, sys.path[0] + "/..")
+
+from db import any_clause, array_param, fetch_all, run_plan, transaction_plan
+
+# 체크리스트별 UTM 코드 (checklists.utm_code JSON의 정규화 사본, migrate_checklist_utm_codes.py)
+# checklists.utm_code를 쓰는 곳은 execute_with_utm_codes로 같은 트랜잭션에서 함께 기록
+CHECKLIST_UTM_CODES_TABLE = "checklist_utm_codes"
+
+
+def parse_utm_codes(utm_code_raw) -> list[str]:
+    """
+    checklists.utm_code -> UTM 코드 목록 (빈 값 제외, 중복은 처음 것만)
+    SQL ad_performance.utm_code_list와 같은 규칙: 배열이면 원소, 배열이 아닌 JSON이면 그 값, JSON이 아니면 원문
+    """
+    if not utm_code_raw:
+        return []
+    if isinstance(utm_code_raw, str):
+        try:
+            codes = json.loads(utm_code_raw)
+        except json.JSONDecodeError:
+            codes = utm_code_raw
+    else:
+        codes = utm_code_raw
+    if not isinstance(codes, list):
+        codes = [codes]
+    return list(dict.fromkeys(str(c) for c in codes if c))
+
+
+def execute_with_utm_codes(query):
+    """
+    checklists에 쓰는 query(update / update_many / upsert)를 실행하고, 반환된 행의 utm_code로
+    checklist_utm_codes를 교체. 두 쓰기는 한 트랜잭션 (query.execute() 대신 사용)
+    """
+    return run_plan(transaction_plan(_write_plan(query)), dict_rows=True)
+
+
+def _write_plan(query):
+    result = yield from query.plan()
+    rows = {str(row["id"]): parse_utm_codes(row.get("utm_code")) for row in result.data}
+    if rows:
+        yield from sync_plan(rows)
+    return result
+
+
+def sync_plan(rows: dict[str, list[str]]):
+    """
+    checklist_id -> UTM 코드 목록으로 교체하는 쿼리 플랜 (db.run_plan 참고). transaction_plan 안에서 실행
+    부모 체크리스트 행을 잠가 같은 체크리스트의 동시 교체를 직렬화하고, 없어진 체크리스트는 건너뜀
+    """
+    checklist_ids = sorted(rows)
+    ids, codes, positions = [], [], []
+    for checklist_id in checklist_ids:
+        for position, code in enumerate(rows[checklist_id]):
+            ids.append(checklist_id)
+            codes.append(code)
+            positions.append(position)
+
+    match, params = any_clause("id", checklist_ids)
+    yield f"SELECT id FROM checklists WHERE {match} ORDER BY id FOR UPDATE", params
+    new_rows = "unnest(%s::uuid[], %s::text[], %s::int[]) AS n(checklist_id, utm_code, position)"
+    new_params = [array_param(ids), array_param(codes), array_param(positions)]
+    # 새 목록에 없는 코드만 지우고 나머지는 upsert
+    yield (
+        f"""
+        DELETE FROM {CHECKLIST_UTM_CODES_TABLE} u
+        WHERE {any_clause("u.checklist_id", checklist_ids)[0]}
+          AND NOT EXISTS (
+              SELECT 1 FROM {new_rows}
+              WHERE n.checklist_id = u.checklist_id AND n.utm_code = u.utm_code
+          )
+        """,
+        params + new_params,
+    )
+    if ids:
+        yield (
+            f"""
+            INSERT INTO {CHECKLIST_UTM_CODES_TABLE} (checklist_id, utm_code, position)
+            SELECT n.checklist_id, n.utm_code, n.position
+            FROM {new_rows}
+            JOIN checklists c ON c.id = n.checklist_id
+            ON CONFLICT (checklist_id, utm_code) DO UPDATE SET position = EXCLUDED.position
+            """,
+            new_params,
+        )
+
+
+def get_week_utm_codes(week: str) -> dict[str, list[str]]:
+    """주차의 체크리스트별 UTM 코드 {checklist_id: [utm_code, ...]} (UTM이 있는 체크리스트만, 등록 순서)"""
+    return run_plan(week_utm_codes_plan(week))
+
+
+def week_utm_codes_plan(week: str):
+    rows = yield (
+        f"""
+        SELECT u.checklist_id, u.utm_code
+        FROM {CHECKLIST_UTM_CODES_TABLE} u
+        JOIN checklists c ON c.id = u.checklist_id
+        WHERE c.week = %s
+        ORDER BY u.checklist_id, u.position
+        """,
+        [week],
+    )
+    by_checklist = {}
+    for checklist_id, utm_code in rows:
+        by_checklist.setdefault(str(checklist_id), []).append(utm_code)
+    return by_checklist
+
+
+def get_checklist_ids_with_utm(week: str = None) -> set[str]:
+    """UTM 코드가 하나 이상 있는 체크리스트 id (week가 없으면 전체)"""
+    week_filter = "WHERE c.week = %s" if week else ""
+    rows = fetch_all(
+        f"""
+        SELECT DISTINCT u.checklist_id
+        FROM {CHECKLIST_UTM_CODES_TABLE} u
+        JOIN checklists c ON c.id = u.checklist_id
+        {week_filter}
+        """,
+        [week] if week else None,
+    )
+    return {str(row[0]) for row in rows}
+
+
+def find_checklists_by_utm(utm_code: str) -> list[dict]:
+    """UTM 코드를 가진 체크리스트 목록 (최근 주차부터)"""
+    return run_plan(find_by_utm_plan(utm_code))
+
+
+def find_by_utm_plan(utm_code: str):
+    rows = yield (
+        f"""
+        SELECT c.id, c.week, c.team_id, c.product_id, c.copy_type_id
+        FROM {CHECKLIST_UTM_CODES_TABLE} u
+        JOIN checklists c ON c.id = u.checklist_id
+        WHERE u.utm_code = %s
+        ORDER BY c.week DESC
+        """,
+        [utm_code],
+    )
+    return [
+        {
+            "id": str(checklist_id),
+            "week": week,
+            "team_id": str(team_id) if team_id else None,
+            "product_id": str(product_id),
+            "copy_type_id": str(copy_type_id),
+        }
+        for checklist_id, week, team_id, product_id, copy_type_id in rows
+    ]
+
+
+def main(utm_code: str):
+    results = find_checklists_by_utm(utm_code)
+    print(f"Found {len(results)} checklists with UTM {utm_code}")
+    for row in results:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find checklists carrying a UTM code")
+    parser.add_argument("--utm-code", required=True, help="UTM code to look up")
+    args = parser.parse_args()
+    main(args.utm_code)
@@ -5,17 +5,32 @@ sys.path.insert(0, "/Users/las/Development/project/ad-copy-dashboard/backend")
 from conn import get_supabase_client
 
 
-def list_copies(product_id: str = None, copy_type_id: str = None):
+def _copies_query(product_id: str = None, copy_type_id: str = None):
     client = get_supabase_client()
-    query = client.table("copies").select("*, products(*), copy_types(*)")
+    query = client.table("copies").select("*, products(id, name), copy_types(id, code, name)")
     if product_id:
         query = query.eq("product_id", product_id)
     if copy_type_id:
         query = query.eq("copy_type_id", copy_type_id)
-    response = query.order("created_at", desc=True).execute()
+    return query.order("created_at", desc=True).native_types()
+
+
+def list_copies(product_id: str = None, copy_type_id: str = None):
+    response = _copies_query(product_id, copy_type_id).execute()
     return response.data
 
 
+def list_copies_page(product_id: str = None, copy_type_id: str = None, cursor: str = None, limit: int = 50):
+    """created_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    response = _copies_query(product_id, copy_type_id).paginate(cursor, limit).execute()
+    return {"data": response.data, "next_cursor": response.next_cursor}
+
+
+def iter_copies(product_id: str = None, copy_type_id: str = None):
+    """list_copies와 같은 결과를 서버 사이드 커서로 한 행씩 반환"""
+    return _copies_query(product_id, copy_type_id).stream()
+
+
 def main(product_id: str = None, copy_type_id: str = None):
     copies = list_copies(product_id, copy_type_id)
     print(f"Found {len(copies)} copies")
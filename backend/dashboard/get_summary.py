@@ -1,7 +1,7 @@
 import argparse
-import json
 from collections import defaultdict
 from conn import get_supabase_client
+from checklists.utm_codes import get_checklist_ids_with_utm
 
 
 def get_dashboard_summary(week: str = None):
@@ -15,13 +15,12 @@ def get_dashboard_summary(week: str = None):
         if ct.get("parent_id"):
             parent_map[ct["id"]] = ct["parent_id"]
 
-    # 2. Generation matrix: group copies by product_id, copy_type_id
-    copies_resp = client.table("copies").select("id, product_id, copy_type_id").execute()
-    all_copies = copies_resp.data
+    # 2. Generation matrix: count copies by product_id, copy_type_id in DB
+    copies_resp = client.table("copies").select("product_id, copy_type_id, count()").execute()
 
     raw_counts = defaultdict(lambda: defaultdict(int))
-    for c in all_copies:
-        raw_counts[c["product_id"]][c["copy_type_id"]] += 1
+    for c in copies_resp.data:
+        raw_counts[c["product_id"]][c["copy_type_id"]] += c["count"]
 
     # Roll up child counts into parent
     rolled_counts = defaultdict(lambda: defaultdict(int))
@@ -37,7 +36,7 @@ def get_dashboard_summary(week: str = None):
     ]
 
     # 3. Total generations
-    total_generations = len(all_copies)
+    total_generations = sum(c["count"] for c in copies_resp.data)
 
     # 4. Recent copies (last 5)
     # Get products lookup for matrix display and recent copies
@@ -65,29 +64,20 @@ def get_dashboard_summary(week: str = None):
     ]
 
     # 5. Checklist stats
-    checklist_query = client.table("checklists").select("id, utm_code, product_id, excluded, team_id")
+    checklist_query = client.table("checklists").select("id, product_id, excluded, team_id")
     if week:
         checklist_query = checklist_query.eq("week", week)
     checklists_resp = checklist_query.execute()
     checklists = checklists_resp.data
 
-    def is_utm_filled(utm_code):
-        """Match frontend parseUtmCodes logic: parse JSON array, check length > 0"""
-        if not utm_code:
-            return False
-        try:
-            parsed = json.loads(utm_code)
-            if isinstance(parsed, list):
-                return len(parsed) > 0
-            return True  # non-array string
-        except (json.JSONDecodeError, TypeError):
-            return bool(utm_code.strip())
+    # UTM이 하나 이상 등록된 체크리스트 (checklist_utm_codes)
+    utm_filled_ids = get_checklist_ids_with_utm(week)
 
     # Filter out excluded items (matching Checklist page behavior)
     active_checklists = [cl for cl in checklists if not cl.get("excluded", False)]
 
     total = len(active_checklists)
-    filled = sum(1 for cl in active_checklists if is_utm_filled(cl.get("utm_code")))
+    filled = sum(1 for cl in active_checklists if str(cl["id"]) in utm_filled_ids)
     completion_rate = round(filled * 100 / total) if total > 0 else 0
 
     checklist_stats = {
@@ -103,7 +93,7 @@ def get_dashboard_summary(week: str = None):
         if not team_id:
             continue
         team_stats[team_id]["total"] += 1
-        if is_utm_filled(cl.get("utm_code")):
+        if str(cl["id"]) in utm_filled_ids:
             team_stats[team_id]["filled"] += 1
 
     team_checklist_stats = {}
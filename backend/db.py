@@ -2,26 +2,162 @@
 PostgreSQL 데이터베이스 클라이언트
 Supabase 클라이언트 인터페이스와 호환되는 래퍼
 """
+import base64
+import json
 import os
+import re
 import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# 스레드별 커넥션 격리
-_thread_local = threading.local()
+# .env 로드 후 import (DB_SLOW_QUERY_MS 등 반영)
+from query_stats import record_query
+
+# 커넥션 풀 설정 (uvicorn 프로세스당)
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# 체크아웃 시 커넥션 검증 정책
+#   idle   : DB_POOL_IDLE_CHECK_SECONDS 이상 쉬었던 커넥션만 SELECT 1 (기본)
+#   always : 매 체크아웃마다 SELECT 1
+#   never  : 검증 없음, 끊긴 커넥션은 QueryBuilder 재시도 경로에 맡김
+POOL_VALIDATE = os.environ.get("DB_POOL_VALIDATE", "idle")
+POOL_IDLE_CHECK_SECONDS = float(os.environ.get("DB_POOL_IDLE_CHECK_SECONDS", "30"))
+
+# 리스트 insert 시 한 INSERT 문에 담을 최대 행 수
+BULK_INSERT_PAGE_SIZE = 1000
+
+# stream() 시 서버 사이드 커서에서 한 번에 가져올 행 수
+STREAM_ITERSIZE = int(os.environ.get("DB_STREAM_ITERSIZE", "500"))
+# 동시에 열 수 있는 stream() 수 (느린 클라이언트가 풀 커넥션을 모두 붙잡지 않도록 풀 크기의 절반까지)
+STREAM_MAX_CONCURRENT = int(os.environ.get("DB_STREAM_MAX_CONCURRENT", str(max(POOL_MAX_SIZE // 2, 1))))
+
+# 커넥션당 server-side prepared statement 최대 개수 (LRU, 0이면 사용 안 함)
+PREPARED_MAX = int(os.environ.get("DB_PREPARED_MAX", "100"))
+# 같은 커넥션에서 이 횟수만큼 실행된 쿼리 형태부터 PREPARE
+PREPARE_THRESHOLD = int(os.environ.get("DB_PREPARE_THRESHOLD", "5"))
+# 쿼리 형태별 생성 SQL 캐시 크기 (프로세스 전역)
+SQL_CACHE_SIZE = 1024
+
+
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    """풀에서 커넥션을 기다리다 시간 초과"""
+
+
+class PreparedSQL(str):
+    """
+    QueryBuilder가 만든, 커넥션별 prepared statement로 실행해도 되는 SQL
+    (파라미터는 모두 %s, 리터럴 %는 %%로 표기된 문장)
+    """
+
+
+def _numbered_placeholders(sql):
+    """%s -> $1, $2, ... (PREPARE 본문용). %%는 이후 파라미터 치환을 거치므로 그대로 둠"""
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%%|%s", lambda m: m.group(0) if m.group(0) == "%%" else f"${next(counter)}", sql)
+
+
+class PreparedStatements:
+    """
+    커넥션 하나의 prepared statement 캐시 (SQL -> 이름, LRU)
+    PREPARE_THRESHOLD회째 실행 때 PREPARE + EXECUTE를 한 번의 왕복으로 보내고 이후엔 EXECUTE만 전송
+    넘치면 가장 오래 안 쓴 문장을 DEALLOCATE. 커넥션이 버려지면 캐시도 함께 사라짐
+    """
+
+    def __init__(self, max_size=PREPARED_MAX, threshold=PREPARE_THRESHOLD):
+        self.max_size = max_size
+        self.threshold = max(threshold, 1)
+        self._names = OrderedDict()  # sql -> statement 이름
+        self._seen = OrderedDict()  # 아직 준비 안 된 sql -> 실행 횟수
+        self._next_id = 0
+        self.hits = 0
+        self.prepares = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def execute(self, cur, sql, params):
+        if not isinstance(sql, PreparedSQL) or self.max_size <= 0:
+            cur.execute(sql, params)
+            return
+        arg_list = " (" + ", ".join(["%s"] * len(params)) + ")" if params else ""
+        name = self._names.get(sql)
+        if name is not None:
+            self._names.move_to_end(sql)
+            self.hits += 1
+            cur.execute(f"EXECUTE {name}{arg_list}", params)
+            return
+
+        seen = self._seen.pop(sql, 0) + 1
+        conn = cur.connection
+        # 트랜잭션 안에서 PREPARE하면 롤백 때 사라지므로 autocommit 상태에서만 준비
+        in_transaction = (
+            not conn.autocommit
+            or conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        if seen < self.threshold or in_transaction:
+            self._seen[sql] = seen
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+            cur.execute(sql, params)
+            return
+
+        name = f"qb_{self._next_id}"
+        self._next_id += 1
+        evicted = self._names.popitem(last=False) if len(self._names) >= self.max_size else None
+        command = f"PREPARE {name} AS {_numbered_placeholders(sql)}; EXECUTE {name}{arg_list}"
+        if evicted is not None:
+            command = f"DEALLOCATE {evicted[1]}; {command}"
+        try:
+            # 여러 문장은 암묵적 트랜잭션 하나로 실행되므로 실패하면 서버 쪽도 바뀐 것이 없음
+            cur.execute(command, params)
+        except Exception:
+            if evicted is not None:
+                self._names[evicted[0]] = evicted[1]
+                self._names.move_to_end(evicted[0], last=False)
+            raise
+        self._names[sql] = name
+        self.prepares += 1
+
+
+class _Connection(psycopg2.extensions.connection):
+    """prepared statement 캐시를 가진 커넥션"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = PreparedStatements()
+
+
+def _execute(cur, sql, params):
+    """커넥션에 prepared statement 캐시가 있으면 거쳐서 실행"""
+    prepared = getattr(cur.connection, "prepared", None)
+    if prepared is None:
+        cur.execute(sql, params)
+    else:
+        prepared.execute(cur, sql, params)
 
 
 def _create_connection():
-    """새 DB 커넥션 생성 + 스키마 설정"""
+    """새 DB 커넥션 생성 + 스키마 설정 (물리 커넥션당 1회)"""
     conn = psycopg2.connect(
         host=os.environ["DB_HOST"],
         port=os.environ["DB_PORT"],
         database=os.environ["DB_NAME"],
         user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"]
+        password=os.environ["DB_PASSWORD"],
+        connection_factory=_Connection,
     )
     conn.autocommit = True
     # 스키마 설정
@@ -39,43 +175,266 @@ def _is_connection_alive(conn):
         cur.execute("SELECT 1")
         cur.close()
         return True
-    except (psycopg2.DatabaseError, psycopg2.OperationalError):
+    except (psycopg2.DatabaseError, psycopg2.OperationalError, psycopg2.InterfaceError):
         return False
 
 
-def get_connection():
-    conn = getattr(_thread_local, "connection", None)
-    if conn is None or conn.closed:
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """min/max 크기와 대기 타임아웃이 있는 스레드 안전 커넥션 풀"""
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 validate=POOL_VALIDATE, idle_check_seconds=POOL_IDLE_CHECK_SECONDS):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+        if validate not in ("idle", "always", "never"):
+            raise ValueError(f"Invalid pool validate policy: {validate}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validate = validate
+        self.idle_check_seconds = idle_check_seconds
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, 반납 시각) — 최근 반납된 커넥션을 먼저 재사용 (LIFO)
+        self._size = 0  # 열려 있는 물리 커넥션 수 (idle + in_use)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "pings": 0,
+            "ping_failures": 0,
+        }
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+            self._size += 1
+
+    def _open(self):
         conn = _create_connection()
-        _thread_local.connection = conn
+        self._stats["connections_created"] += 1
         return conn
-    # 기존 커넥션이 살아있는지 확인
-    if not _is_connection_alive(conn):
-        try:
-            conn.close()
-        except Exception:
-            pass
-        conn = _create_connection()
-        _thread_local.connection = conn
-    return conn
 
+    def _needs_validation(self, idle_since):
+        if self.validate == "always":
+            return True
+        if self.validate == "idle":
+            return time.monotonic() - idle_since >= self.idle_check_seconds
+        return False
+
+    def getconn(self, timeout=None, force_validate=False):
+        """
+        커넥션 체크아웃. 풀이 가득 차면 timeout초까지 대기
+        force_validate=True면 정책과 무관하게 idle 커넥션을 ping (재시도 경로용)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            conn, idle_since = self._acquire(deadline, timeout)
+            if conn is None:
+                return self._open_reserved()
+            if not force_validate and not self._needs_validation(idle_since):
+                return conn
+            # ping은 락 밖에서 수행
+            alive = _is_connection_alive(conn)
+            with self._cond:
+                self._stats["pings"] += 1
+                if not alive:
+                    self._stats["ping_failures"] += 1
+            if alive:
+                return conn
+            self.putconn(conn, discard=True)
+
+    def _acquire(self, deadline, timeout):
+        """idle 커넥션을 꺼내거나, 새로 열 자리를 예약하면 (None, None) 반환"""
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+                while self._idle:
+                    conn, idle_since = self._idle.pop()
+                    if conn.closed:
+                        self._size -= 1
+                        self._stats["connections_discarded"] += 1
+                        continue
+                    self._in_use += 1
+                    self._stats["checkouts"] += 1
+                    return conn, idle_since
+                if self._size < self.max_size:
+                    # 물리 커넥션 생성은 락 밖에서 수행
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {timeout}s waiting for a DB connection "
+                        f"(pool max={self.max_size})"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
 
-def _reset_connection():
-    """현재 스레드의 커넥션을 강제 재생성"""
-    old_conn = getattr(_thread_local, "connection", None)
-    if old_conn is not None:
+    def _open_reserved(self):
         try:
-            old_conn.close()
+            conn = _create_connection()
         except Exception:
-            pass
-    conn = _create_connection()
-    _thread_local.connection = conn
-    return conn
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["connections_created"] += 1
+            self._stats["checkouts"] += 1
+            self._in_use += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """커넥션 반납. 깨졌거나 discard=True면 닫고 버림"""
+        if not discard and not conn.closed:
+            try:
+                # 트랜잭션이 열린 채 반납되면 롤백 후 autocommit 복구
+                # autocommit 커넥션에서 명시적 BEGIN으로 연 트랜잭션은 conn.rollback()이 무시하므로 ROLLBACK 문으로
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    if conn.autocommit:
+                        with conn.cursor() as cur:
+                            cur.execute("ROLLBACK")
+                    else:
+                        conn.rollback()
+                if not discard and not conn.autocommit:
+                    conn.autocommit = True
+            except (psycopg2.DatabaseError, psycopg2.InterfaceError):
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self._stats["connections_discarded"] += 1
+                _close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                _close_quietly(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "validate": self.validate,
+                **self._stats,
+                "prepared_statements": sum(len(conn.prepared) for conn, _ in self._idle),
+                "sql_cache": _select_statement.cache_info()._asdict(),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+
+def get_pool():
+    """프로세스 전역 커넥션 풀 (첫 사용 시 생성)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def get_pool_stats():
+    return get_pool().stats()
+
+
+@contextmanager
+def pooled_connection():
+    """
+    풀에서 커넥션을 빌려 쓰고 블록이 끝나면 반납
+
+    Usage:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        pool.putconn(conn, discard=True)
+        raise
+    except psycopg2.DatabaseError:
+        # 트랜잭션이 열린 채 실패했으면 (명시적 BEGIN 플랜 등) 상태를 믿을 수 없으므로 버림
+        in_transaction = (
+            conn.closed
+            or conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        pool.putconn(conn, discard=in_transaction)
+        raise
+    except BaseException:
+        pool.putconn(conn)
+        raise
+    else:
+        pool.putconn(conn)
+
+
+def get_connection():
+    """
+    풀을 거치지 않는 전용 커넥션 (마이그레이션 등 단발성 스크립트용)
+    호출자가 직접 close 해야 함. API 코드에서는 pooled_connection()을 사용
+    """
+    return _create_connection()
+
+
+def array_param(values):
+    """
+    값 목록 -> PostgreSQL 배열 리터럴 문자열 (예: {"a","b"})
+    타입 없는 리터럴로 전달되므로 비교 대상(text, uuid 등)의 배열 타입으로 해석됨
+    """
+    items = []
+    for value in values:
+        if value is None:
+            items.append("NULL")
+        else:
+            text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            items.append(f'"{text}"')
+    return "{" + ",".join(items) + "}"
+
+
+def any_clause(expr, values):
+    """
+    expr IN (%s, %s, ...) 대신 expr = ANY(%s) 조건과 파라미터
+    값 개수와 무관하게 SQL이 같아 문장이 짧고 prepared statement / 플랜을 재사용할 수 있음
+    """
+    return f"{expr} = ANY(%s)", [array_param(values)]
 
 
 def serialize_row(row):
     """datetime 객체를 ISO 문자열로 변환"""
-    from datetime import datetime, date
     result = {}
     for key, value in row.items():
         if isinstance(value, (datetime, date)):
@@ -88,9 +447,395 @@ def serialize_row(row):
 
 
 class QueryResult:
-    def __init__(self, data):
-        # datetime 직렬화
-        self.data = [serialize_row(row) if isinstance(row, dict) else row for row in data]
+    def __init__(self, data, count=None, serialize=True):
+        # datetime 직렬화 (serialize=False면 드라이버 값 그대로, JSON 응답에서 한 번에 인코딩)
+        if serialize:
+            data = [serialize_row(row) if isinstance(row, dict) else row for row in data]
+        self.data = data
+        # select(count="exact")일 때 조건에 맞는 전체 행 수
+        self.count = count
+        # paginate() 사용 시 다음 페이지 커서 (마지막 페이지면 None)
+        self.next_cursor = None
+
+
+def encode_cursor(row, columns):
+    """페이지네이션 커서: 마지막 행의 정렬 키 값을 base64(JSON)으로 인코딩"""
+    raw = json.dumps([row[c] for c in columns], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, column_types=None):
+    """
+    encode_cursor의 역. column_types(정렬 컬럼별 PostgreSQL 타입 목록)를 주면 값을 그 타입으로 변환
+    형식이 틀린 커서는 DB에 보내기 전에 ValueError (API에서 400)
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid pagination cursor")
+    if column_types is not None:
+        if len(values) != len(column_types):
+            raise ValueError("Cursor does not match pagination columns")
+        try:
+            values = [_cursor_value(v, t) for v, t in zip(values, column_types)]
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise ValueError("Invalid pagination cursor") from e
+    return values
+
+
+def _cursor_value(value, pg_type):
+    """커서 값 하나를 정렬 컬럼 타입의 Python 값으로 (모르는 타입은 그대로)"""
+    if value is None or pg_type is None:
+        return value
+    if pg_type.startswith("timestamp"):
+        return datetime.fromisoformat(value)
+    if pg_type == "date":
+        return date.fromisoformat(value)
+    if pg_type == "uuid":
+        return str(uuid.UUID(value))
+    if pg_type in ("smallint", "integer", "bigint"):
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"Invalid integer: {value!r}")
+        return int(value)
+    if pg_type.startswith("numeric") or pg_type in ("real", "double precision"):
+        return Decimal(str(value))
+    if pg_type in ("text", "boolean") or pg_type.startswith(("character", "varchar")):
+        expected = bool if pg_type == "boolean" else str
+        if not isinstance(value, expected):
+            raise ValueError(f"Invalid {pg_type}: {value!r}")
+    return value
+
+
+# 테이블별 컬럼 타입 캐시 {table_name: {column: type}}
+_column_types_cache = {}
+
+
+def run_plan(plan, cur=None, retries=0, dict_rows=False):
+    """
+    쿼리 플랜 실행. 플랜은 (sql, params)를 yield하고 결과 행 목록(결과가 없으면 None)을 돌려받는 generator
+    드라이버와 무관하므로 같은 플랜을 async_db.run_plan_async로도 실행할 수 있음
+    cur가 없으면 풀 커넥션의 기본(tuple) 커서로 실행 (dict_rows=True면 dict 커서, QueryBuilder.plan() 합성용)
+    문장마다 query_stats에 기록
+    """
+    if cur is None:
+        cursor_factory = psycopg2.extras.RealDictCursor if dict_rows else None
+        with pooled_connection() as conn:
+            with conn.cursor(cursor_factory=cursor_factory) as own_cur:
+                return run_plan(plan, own_cur, retries)
+    try:
+        sql, params = next(plan)
+    except StopIteration as stop:
+        return stop.value
+    while True:
+        started = time.perf_counter()
+        _execute(cur, sql, params)
+        rows = cur.fetchall() if cur.description is not None else None
+        record_query(sql, time.perf_counter() - started, len(rows) if rows is not None else cur.rowcount, retries)
+        try:
+            sql, params = plan.send(rows)
+        except StopIteration as stop:
+            return stop.value
+
+
+def transaction_plan(plan):
+    """
+    플랜 전체를 한 트랜잭션으로 (BEGIN ... COMMIT). 안쪽 플랜이 보내는 BEGIN/COMMIT은 건너뜀
+    중간에 실패하면 커넥션 반납 때 ROLLBACK (ConnectionPool.putconn)
+    """
+    yield "BEGIN", None
+    rows = None
+    while True:
+        try:
+            sql, params = plan.send(rows)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        rows = None if sql in ("BEGIN", "COMMIT") else (yield sql, params)
+    yield "COMMIT", None
+    return result
+
+
+def fetch_all(sql, params=None):
+    """쿼리 한 문장을 풀 커넥션으로 실행하고 tuple 행 목록 반환 (run_plan 경유로 계측 포함)"""
+    return run_plan(_statement_plan(sql, params))
+
+
+def _statement_plan(sql, params):
+    rows = yield sql, params
+    return rows
+
+
+def _column_types_plan(table_name):
+    """bulk update / 페이지네이션 커서 변환용 컬럼 타입 조회 (테이블당 1회)"""
+    types = _column_types_cache.get(table_name)
+    if types is None:
+        rows = yield (
+            """
+            SELECT attname, format_type(atttypid, atttypmod) AS type
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+            """,
+            (f'"{table_name}"',),
+        )
+        types = {row["attname"]: row["type"] for row in rows}
+        _column_types_cache[table_name] = types
+    return types
+
+
+def _parse_column_list(text):
+    """"id, name" -> ["id", "name"], "*" -> None (전체 컬럼)"""
+    columns = [c.strip() for c in text.split(",") if c.strip()]
+    if not columns or "*" in columns:
+        return None
+    return columns
+
+
+# 중첩 임베드 최대 깊이 (예: best_copies -> copies -> products 는 2)
+MAX_EMBED_DEPTH = 3
+
+
+# 스키마별 FK 관계 캐시 {schema: [(table, column, ref_table, ref_column)]}
+_relationships_cache = {}
+
+
+def load_relationships(cur=None, reload=False):
+    """
+    현재 스키마의 FK 관계를 카탈로그에서 읽어 캐시 (스키마당 1회)
+    단일 컬럼 FK만 대상. FK를 추가하는 마이그레이션 후에는 reload=True 또는 재시작
+    """
+    return run_plan(_relationships_plan(reload), cur)
+
+
+def _relationships_plan(reload=False):
+    schema = os.environ.get("DB_SCHEMA", "public")
+    relationships = _relationships_cache.get(schema)
+    if relationships is not None and not reload:
+        return relationships
+    rows = yield (
+        """
+        SELECT cl.relname AS table_name, a.attname AS column_name,
+               rcl.relname AS ref_table, ra.attname AS ref_column
+        FROM pg_constraint c
+        JOIN pg_class cl ON cl.oid = c.conrelid
+        JOIN pg_class rcl ON rcl.oid = c.confrelid
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        JOIN pg_attribute ra ON ra.attrelid = c.confrelid AND ra.attnum = c.confkey[1]
+        WHERE c.contype = 'f'
+          AND c.connamespace = %s::regnamespace
+          AND rcl.relnamespace = c.connamespace
+          AND array_length(c.conkey, 1) = 1
+        ORDER BY cl.relname, a.attname
+        """,
+        (f'"{schema}"',),
+    )
+    # 기본 커서(tuple)와 dict 커서 모두에서 실행될 수 있으므로 컬럼 순서로 꺼냄
+    relationships = [tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in rows]
+    _relationships_cache[schema] = relationships
+    return relationships
+
+
+def _find_relationship(relationships, parent_table, table, hint=None):
+    """
+    부모 테이블과 임베드 테이블 사이 관계 -> (일대다 여부, 부모 쪽 컬럼, 임베드 쪽 컬럼)
+    다대일: checklists.product_id -> products.id, 일대다: teams.id <- team_products.team_id
+    """
+    candidates = [
+        (False, column, ref_column)
+        for src, column, ref_table, ref_column in relationships
+        if src == parent_table and ref_table == table
+    ]
+    if parent_table != table:
+        candidates += [
+            (True, ref_column, column)
+            for src, column, ref_table, ref_column in relationships
+            if src == table and ref_table == parent_table
+        ]
+    if hint:
+        # 힌트는 FK 컬럼명 (예: "users!created_by(*)")
+        candidates = [c for c in candidates if (c[2] if c[0] else c[1]) == hint]
+    if not candidates:
+        raise ValueError(f"No relationship found between {parent_table} and {table}")
+    if len(candidates) > 1:
+        raise ValueError(
+            f"More than one relationship between {parent_table} and {table}; "
+            f"specify the FK column, e.g. {table}!<fk_column>(...)"
+        )
+    return candidates[0]
+
+
+class _Embed:
+    """select 문자열의 임베드 하나 (예: copies(*, products(id, name)))"""
+
+    def __init__(self, table, columns, embeds, hint=None):
+        self.table = table
+        self.columns = columns  # None이면 전체 컬럼
+        self.embeds = embeds
+        self.hint = hint
+        # resolve()에서 FK 관계로 채움
+        self.many = False
+        self.local_column = None  # 부모 테이블 쪽 조인 컬럼
+        self.remote_column = None  # 임베드 테이블 쪽 조인 컬럼
+
+    @property
+    def key_name(self):
+        # 다대일은 단수형 객체 (teams -> team), 일대다는 테이블명 그대로 배열
+        return self.table if self.many else _singular_name(self.table)
+
+    def resolve(self, relationships, parent_table):
+        self.many, self.local_column, self.remote_column = _find_relationship(
+            relationships, parent_table, self.table, self.hint
+        )
+        for embed in self.embeds:
+            embed.resolve(relationships, self.table)
+
+    def _required_columns(self):
+        # 매핑용 조인 컬럼 + 하위 임베드의 부모 쪽 컬럼
+        return [self.remote_column] + [e.local_column for e in self.embeds]
+
+    def select_list(self):
+        """배치 조회 SELECT 목록 (요청 컬럼 + 조인에 필요한 컬럼)"""
+        if self.columns is None:
+            return "*"
+        needed = self.columns + self._required_columns()
+        return ", ".join(_quote_column(c) for c in dict.fromkeys(needed))
+
+    def hidden_columns(self):
+        """조회는 했지만 요청하지 않아 결과에서 지울 컬럼"""
+        if self.columns is None:
+            return []
+        return [c for c in dict.fromkeys(self._required_columns()) if c not in self.columns]
+
+
+def _split_select(text):
+    """최상위 쉼표로만 분리 (괄호 안의 쉼표는 유지)"""
+    parts, buf, depth = [], [], 0
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced parentheses in select: {text}")
+        if ch == "," and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(ch)
+    if depth != 0:
+        raise ValueError(f"Unbalanced parentheses in select: {text}")
+    parts.append("".join(buf).strip())
+    return [p for p in parts if p]
+
+
+def _parse_select(text, depth=0):
+    """
+    select 문자열 파싱 -> (일반 컬럼, 집계, 임베드)
+    "*, copies(*, products(id, name))" 처럼 임베드는 재귀적으로 파싱
+    FK가 여럿이면 "users!created_by(name)" 처럼 FK 컬럼을 지정
+    """
+    columns, aggregates, embeds = [], [], []
+    for token in _split_select(text):
+        m = re.fullmatch(r'(\w+)(?:!(\w+))?\((.*)\)', token, re.S)
+        if m and m.group(3).strip():
+            if depth + 1 > MAX_EMBED_DEPTH:
+                raise ValueError(f"Embeds nested deeper than {MAX_EMBED_DEPTH} levels: {m.group(1)}")
+            sub_columns, sub_aggregates, sub_embeds = _parse_select(m.group(3), depth + 1)
+            if sub_aggregates:
+                raise ValueError("Aggregates are not supported inside embedded tables")
+            embeds.append(_Embed(m.group(1), _parse_column_list(", ".join(sub_columns)), sub_embeds, m.group(2)))
+            continue
+        m = re.fullmatch(r'(?:(\w+):)?(?:(\w+)\.)?(count|sum|avg)\(\)', token)
+        if m:
+            alias, column, func = m.groups()
+            if func != "count" and not column:
+                raise ValueError(f"{func}() requires a column, e.g. amount.{func}()")
+            aggregates.append((alias or func, func, column))
+            continue
+        columns.append(token)
+    return columns, aggregates, embeds
+
+
+def _quote_column(column):
+    # 단순 식별자만 따옴표 처리 (표현식은 그대로)
+    return f'"{column}"' if re.fullmatch(r"\w+", column) else column
+
+
+def _singular_name(table):
+    # 테이블명 단수형 (예: teams -> team, copies -> copy)
+    if table.endswith('ies'):
+        return f"{table[:-3]}y"
+    return table[:-1] if table.endswith('s') else table
+
+
+def _values_pages(rows, template, page_size=BULK_INSERT_PAGE_SIZE):
+    """다중 행 VALUES를 page_size 행씩 (VALUES 목록 SQL, 평탄화한 파라미터)로 나눔"""
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        yield ", ".join([template] * len(page)), [value for row in page for value in row]
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _projection_list(select_cols, required):
+    """(SELECT 목록, 결과에서 지울 컬럼 tuple) — 캐시되므로 반환값은 변경하지 않음"""
+    requested = _parse_column_list(select_cols)
+    if requested is None:
+        return select_cols, ()
+    hidden = tuple(c for c in dict.fromkeys(required) if c not in requested)
+    return ", ".join(_quote_column(c) for c in requested + list(hidden)), hidden
+
+
+def _where_sql(where_clauses):
+    return " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _select_statement(table, select_list, where_clauses, group_by, orders, limit, offset):
+    """쿼리 형태(인자 전부 hashable)별 SELECT 문 — QueryBuilder가 매번 문자열을 다시 만들지 않도록 캐시"""
+    sql = f'SELECT {select_list} FROM "{table}"' + _where_sql(where_clauses)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(group_by)
+    if orders:
+        sql += " ORDER BY " + ", ".join(
+            f'"{column}"' + (" DESC" if desc else "") for column, desc in orders
+        )
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    if offset:
+        sql += f" OFFSET {int(offset)}"
+    return sql
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _count_statement(table, where_clauses):
+    return f'SELECT COUNT(*) AS count FROM "{table}"' + _where_sql(where_clauses)
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _insert_statement(table, columns, returning):
+    col_names = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = f'INSERT INTO "{table}" ({col_names}) VALUES ({placeholders})'
+    return sql + " RETURNING *" if returning else sql
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _update_statement(table, columns, where_clauses):
+    set_clause = ", ".join(f'"{c}" = %s' for c in columns)
+    return f'UPDATE "{table}" SET {set_clause}' + _where_sql(where_clauses) + " RETURNING *"
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _delete_statement(table, where_clauses):
+    return f'DELETE FROM "{table}"' + _where_sql(where_clauses) + " RETURNING *"
+
+
+def _drop_columns(rows, columns):
+    if columns:
+        for row in rows:
+            for column in columns:
+                row.pop(column, None)
 
 
 class QueryBuilder:
@@ -99,33 +844,81 @@ class QueryBuilder:
         self._select_cols = "*"
         self._where_clauses = []
         self._where_values = []
-        self._order_by = None
-        self._order_desc = False
+        self._orders = []  # [(column, desc), ...]
         self._limit = None
+        self._offset = None
+        self._page_size = None
+        self._page_columns = None
+        self._page_cursor = None  # (where 값 목록에서 커서 값 시작 위치, 커서 문자열)
         self._single = False
         self._operation = "select"
         self._insert_data = None
+        self._returning = "representation"
+        self._on_conflict = None
+        self._ignore_duplicates = False
         self._update_data = None
+        self._update_rows = None
+        self._update_key = "id"
         self._joins = []
+        self._aggregates = []
+        self._group_by = None
+        self._count = None
+        self._head = False
+        # False면 생성 SQL을 prepared statement로 실행하지 않음
+        self._preparable = True
+        self._serialize = True
 
-    def select(self, cols="*"):
+    def select(self, cols="*", count=None, head=False):
+        """
+        count="exact"면 조건에 맞는 전체 행 수를 result.count에 담음
+        head=True면 행은 가져오지 않고 count만 조회
+        집계: "status, count()", "product_id, total:ad_spend.sum()" (count/sum/avg)
+        """
+        if count not in (None, "exact"):
+            raise ValueError(f"Unsupported count mode: {count}")
         self._operation = "select"
         self._select_cols = cols
-        # 조인 쿼리 파싱 (예: "*, teams(*)")
-        self._joins = []
-        if "(*)" in cols:
-            import re
-            # teams(*) 같은 패턴 찾기
-            join_matches = re.findall(r'(\w+)\(\*\)', cols)
-            for join_table in join_matches:
-                self._joins.append(join_table)
-            # 조인 부분 제거하고 기본 컬럼만 남기기
-            self._select_cols = re.sub(r',?\s*\w+\(\*\)', '', cols).strip().rstrip(',').strip() or "*"
+        self._count = "exact" if head else count
+        self._head = head
+        # 조인/집계 파싱 (예: "*, teams(*)", "id, products(id, name)", "status, count()")
+        columns, self._aggregates, self._joins = _parse_select(cols)
+        if self._aggregates and self._joins:
+            raise ValueError("Aggregates cannot be combined with embedded tables")
+        self._select_cols = ", ".join(columns)
+        if not self._aggregates:
+            self._select_cols = self._select_cols or "*"
+        return self
+
+    def group_by(self, *columns):
+        """집계 시 그룹 컬럼 지정 (생략하면 select의 일반 컬럼으로 그룹핑)"""
+        self._group_by = list(columns)
         return self
 
-    def insert(self, data):
+    def insert(self, data, returning="representation"):
+        """
+        단일 dict 또는 dict 리스트 insert
+        returning="minimal"이면 RETURNING 없이 실행하고 data는 빈 리스트
+        """
+        if returning not in ("representation", "minimal"):
+            raise ValueError(f"Invalid returning: {returning}")
         self._operation = "insert"
         self._insert_data = data
+        self._returning = returning
+        return self
+
+    def upsert(self, data, on_conflict, ignore_duplicates=False, returning="representation"):
+        """
+        INSERT ... ON CONFLICT (on_conflict) DO UPDATE / DO NOTHING
+        on_conflict: 충돌 판정 컬럼 리스트 (또는 "a,b" 문자열), 해당 unique 제약이 있어야 함
+        ignore_duplicates=True면 기존 행은 건드리지 않고, data에는 새로 insert된 행만 담김
+        """
+        if isinstance(on_conflict, str):
+            on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        if not on_conflict:
+            raise ValueError("upsert requires on_conflict columns")
+        self.insert(data, returning=returning)
+        self._on_conflict = list(on_conflict)
+        self._ignore_duplicates = ignore_duplicates
         return self
 
     def update(self, data):
@@ -133,6 +926,17 @@ class QueryBuilder:
         self._update_data = data
         return self
 
+    def update_many(self, rows, key="id"):
+        """
+        행마다 다른 값을 한 번에 UPDATE ... FROM (VALUES ...)로 적용
+        rows: [{key: ..., col: value, ...}, ...] — 컬럼 구성이 같은 행끼리 한 문장으로 묶임
+        같은 key가 여러 번 나오면 마지막 값만 적용. 업데이트된 행을 반환
+        """
+        self._operation = "update_many"
+        self._update_rows = rows
+        self._update_key = key
+        return self
+
     def delete(self):
         self._operation = "delete"
         return self
@@ -150,9 +954,13 @@ class QueryBuilder:
     def is_(self, column, value):
         if value is None:
             self._where_clauses.append(f'"{column}" IS NULL')
+        elif isinstance(value, bool):
+            # IS 뒤에는 파라미터($1)가 올 수 없으므로 PREPARE 가능한 리터럴로
+            self._where_clauses.append(f'"{column}" IS {"TRUE" if value else "FALSE"}')
         else:
             self._where_clauses.append(f'"{column}" IS %s')
             self._where_values.append(value)
+            self._preparable = False
         return self
 
     def in_(self, column, values):
@@ -160,14 +968,55 @@ class QueryBuilder:
             # 빈 배열이면 결과 없음 조건 추가
             self._where_clauses.append("FALSE")
         else:
-            placeholders = ", ".join(["%s"] * len(values))
-            self._where_clauses.append(f'"{column}" IN ({placeholders})')
-            self._where_values.extend(values)
+            clause, params = any_clause(f'"{column}"', values)
+            self._where_clauses.append(clause)
+            self._where_values.extend(params)
         return self
 
     def order(self, column, desc=False):
-        self._order_by = column
-        self._order_desc = desc
+        # 여러 번 호출하면 정렬 키가 순서대로 추가됨
+        self._orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        """start~end번째 행 (0부터, 양끝 포함)"""
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def paginate(self, cursor=None, page_size=50, columns=("created_at", "id"), desc=True):
+        """
+        keyset 페이지네이션: columns 순으로 정렬하고 cursor 다음 행부터 page_size개
+        cursor는 이전 결과의 next_cursor (없으면 첫 페이지). 마지막 페이지면 next_cursor는 None
+        columns의 마지막은 유일한 컬럼이어야 함 (보통 id)
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        columns = list(columns)
+        self._orders = [(c, desc) for c in columns]
+        self._page_size = page_size
+        self._page_columns = columns
+        # 다음 페이지 존재 여부 확인용으로 1행 더 조회
+        self._limit = page_size + 1
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(columns):
+                raise ValueError("Cursor does not match pagination columns")
+            col_list = ", ".join(f'"{c}"' for c in columns)
+            placeholders = ", ".join(["%s"] * len(columns))
+            op = "<" if desc else ">"
+            self._where_clauses.append(f"({col_list}) {op} ({placeholders})")
+            # 값은 실행 시 컬럼 타입으로 변환해 바꿔 끼움 (_plan)
+            self._page_cursor = (len(self._where_values), cursor)
+            self._where_values.extend(values)
+        return self
+
+    def native_types(self):
+        """
+        select 결과의 datetime 등을 ISO 문자열로 바꾸지 않고 그대로 반환 (execute / stream 모두)
+        api.FastJSONResponse처럼 datetime을 직접 인코딩하는 응답에 넘길 때 행을 한 번 덜 순회함
+        """
+        self._serialize = False
         return self
 
     def limit(self, count):
@@ -182,152 +1031,345 @@ class QueryBuilder:
     def execute(self):
         return self._execute_with_retry()
 
+    def plan(self):
+        """
+        execute()와 같은 연산의 쿼리 플랜 (QueryResult 반환). 다른 플랜에 yield from으로 합성해
+        transaction_plan으로 묶을 때 사용. 결과 행이 dict여야 하므로 run_plan(..., dict_rows=True)로 실행
+        """
+        return self._plan()
+
+    def stream(self, itersize=STREAM_ITERSIZE):
+        """
+        select 결과를 서버 사이드(named) 커서로 itersize 행씩 가져오며 한 행씩 yield
+        전체 결과를 메모리에 올리지 않음. 조인 데이터는 itersize 묶음마다 배치 로드
+        마지막 묶음은 커넥션을 반납한 뒤 내보내므로 itersize 행 미만의 결과는 버퍼링과 같음
+        그보다 크면 순회가 끝나거나 close()될 때까지 풀 커넥션 하나를 점유 (재시도 없음)
+        동시 스트림은 STREAM_MAX_CONCURRENT개까지, 넘으면 POOL_TIMEOUT초 대기 후 PoolTimeoutError
+        """
+        if self._operation != "select" or self._aggregates or self._single:
+            raise ValueError("stream() supports plain select queries only")
+        if not _stream_slots.acquire(timeout=POOL_TIMEOUT):
+            raise PoolTimeoutError(f"No stream slot available within {POOL_TIMEOUT}s")
+        pool = get_pool()
+        try:
+            conn = pool.getconn()
+        except BaseException:
+            _stream_slots.release()
+            raise
+        held = True
+        discard = False
+        try:
+            # named 커서는 트랜잭션 안에서만 동작
+            conn.autocommit = False
+            join_cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) if self._joins else None
+            if join_cur is not None:
+                run_plan(self._resolve_joins_plan(), join_cur)
+            sql, params = self._select_sql()
+            hidden = self._projection()[1]
+            cur = conn.cursor(name=f"qb_stream_{id(self):x}", cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.itersize = itersize
+            # 계측은 소비자 처리 시간을 빼고 DB 대기 시간만 합산해 순회 끝에 1회 기록
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            db_time = time.perf_counter() - started
+            row_count = 0
+            # 청크가 바뀌어도 이미 읽은 조인 행은 재사용
+            join_cache = {}
+            while held:
+                started = time.perf_counter()
+                rows = cur.fetchmany(itersize)
+                db_time += time.perf_counter() - started
+                row_count += len(rows)
+                chunk = [dict(row) for row in rows]
+                if chunk and join_cur is not None:
+                    run_plan(self._embeds_plan(chunk, self._joins, join_cache), join_cur)
+                if len(rows) < itersize:
+                    # 마지막 묶음: 소비자에게 넘기기 전에 커넥션 반납
+                    record_query(sql, db_time, row_count)
+                    cur.close()
+                    conn.rollback()
+                    held = False
+                    pool.putconn(conn)
+                    _stream_slots.release()
+                _drop_columns(chunk, hidden)
+                for row in chunk:
+                    yield serialize_row(row) if self._serialize else row
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            # 순회 중 오류 / close() (클라이언트 연결 끊김 등)
+            if held:
+                pool.putconn(conn, discard=discard)
+                _stream_slots.release()
+
     def _execute_with_retry(self, _retried=False):
-        conn = get_connection()
+        pool = get_pool()
+        # 재시도 때는 또 끊긴 커넥션을 받지 않도록 검증 후 사용
+        conn = pool.getconn(force_validate=_retried)
         cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         try:
-            if self._operation == "select":
-                # 조인이 있는 경우 처리
-                if self._joins:
-                    # 메인 테이블의 모든 컬럼 가져오기
-                    main_alias = "t1"
-                    sql = f'SELECT {main_alias}.* FROM "{self.table_name}" {main_alias}'
-
-                    # 조인 테이블들 추가
-                    for i, join_table in enumerate(self._joins):
-                        join_alias = f"j{i}"
-                        # FK 관계 추측 (예: users.team_id -> teams.id)
-                        fk_col = f"{join_table[:-1]}_id" if join_table.endswith('s') else f"{join_table}_id"
-                        sql += f' LEFT JOIN "{join_table}" {join_alias} ON {main_alias}."{fk_col}" = {join_alias}."id"'
-
-                    if self._where_clauses:
-                        # WHERE 절의 컬럼에 별칭 추가
-                        where_parts = []
-                        for clause in self._where_clauses:
-                            where_parts.append(f'{main_alias}.{clause}')
-                        sql += " WHERE " + " AND ".join(where_parts)
-                    if self._order_by:
-                        sql += f' ORDER BY {main_alias}."{self._order_by}"'
-                        if self._order_desc:
-                            sql += " DESC"
-                    if self._limit:
-                        sql += f" LIMIT {self._limit}"
-
-                    cur.execute(sql, self._where_values)
-                    rows = cur.fetchall()
-                    results = [dict(row) for row in rows]
-
-                    # 배치 쿼리로 조인 데이터 가져오기 (N+1 문제 해결)
-                    for join_table in self._joins:
-                        fk_col = f"{join_table[:-1]}_id" if join_table.endswith('s') else f"{join_table}_id"
-                        key_name = join_table[:-1] if join_table.endswith('s') else join_table
-
-                        # 모든 FK 값 수집
-                        fk_values = list(set(r.get(fk_col) for r in results if r.get(fk_col)))
-
-                        if fk_values:
-                            # 한 번의 쿼리로 모든 조인 데이터 가져오기
-                            placeholders = ','.join(['%s'] * len(fk_values))
-                            cur.execute(f'SELECT * FROM "{join_table}" WHERE "id" IN ({placeholders})', fk_values)
-                            join_rows = cur.fetchall()
-                            join_map = {row['id']: dict(row) for row in join_rows}
-
-                            # 결과에 매핑
-                            for r in results:
-                                fk_val = r.get(fk_col)
-                                r[key_name] = join_map.get(fk_val) if fk_val else None
-                        else:
-                            for r in results:
-                                r[key_name] = None
-
-                    result = QueryResult(results)
-                    if self._single:
-                        result.data = result.data[0] if result.data else None
-                    return result
-                else:
-                    sql = f'SELECT {self._select_cols} FROM "{self.table_name}"'
-                    if self._where_clauses:
-                        sql += " WHERE " + " AND ".join(self._where_clauses)
-                    if self._order_by:
-                        sql += f' ORDER BY "{self._order_by}"'
-                        if self._order_desc:
-                            sql += " DESC"
-                    if self._limit:
-                        sql += f" LIMIT {self._limit}"
-
-                    cur.execute(sql, self._where_values)
-                    rows = cur.fetchall()
-                    result = QueryResult([dict(row) for row in rows])
-                    if self._single:
-                        result.data = result.data[0] if result.data else None
-                    return result
-
-            elif self._operation == "insert":
-                if isinstance(self._insert_data, list):
-                    # Bulk insert
-                    if not self._insert_data:
-                        return QueryResult([])
-                    cols = self._insert_data[0].keys()
-                    col_names = ", ".join(f'"{c}"' for c in cols)
-                    placeholders = ", ".join(["%s"] * len(cols))
-                    sql = f'INSERT INTO "{self.table_name}" ({col_names}) VALUES ({placeholders}) RETURNING *'
-
-                    results = []
-                    for item in self._insert_data:
-                        values = [item.get(c) for c in cols]
-                        cur.execute(sql, values)
-                        results.append(dict(cur.fetchone()))
-                    return QueryResult(results)
-                else:
-                    # Single insert
-                    cols = self._insert_data.keys()
-                    col_names = ", ".join(f'"{c}"' for c in cols)
-                    placeholders = ", ".join(["%s"] * len(cols))
-                    values = list(self._insert_data.values())
-                    sql = f'INSERT INTO "{self.table_name}" ({col_names}) VALUES ({placeholders}) RETURNING *'
-
-                    cur.execute(sql, values)
-                    row = cur.fetchone()
-                    return QueryResult([dict(row)] if row else [])
-
-            elif self._operation == "update":
-                set_clauses = []
-                set_values = []
-                for col, val in self._update_data.items():
-                    set_clauses.append(f'"{col}" = %s')
-                    set_values.append(val)
-
-                sql = f'UPDATE "{self.table_name}" SET {", ".join(set_clauses)}'
-                if self._where_clauses:
-                    sql += " WHERE " + " AND ".join(self._where_clauses)
-                sql += " RETURNING *"
-
-                cur.execute(sql, set_values + self._where_values)
-                rows = cur.fetchall()
-                return QueryResult([dict(row) for row in rows])
-
-            elif self._operation == "delete":
-                sql = f'DELETE FROM "{self.table_name}"'
-                if self._where_clauses:
-                    sql += " WHERE " + " AND ".join(self._where_clauses)
-                sql += " RETURNING *"
-
-                cur.execute(sql, self._where_values)
-                rows = cur.fetchall()
-                return QueryResult([dict(row) for row in rows])
-
+            result = self._run(cur, retries=1 if _retried else 0)
         except (psycopg2.DatabaseError, psycopg2.OperationalError):
             try:
                 cur.close()
             except Exception:
                 pass
+            # 문제 있는 커넥션은 풀에 되돌리지 않고 버림
+            pool.putconn(conn, discard=True)
             if not _retried:
-                _reset_connection()
                 return self._execute_with_retry(_retried=True)
             raise
-        else:
+        except BaseException:
             cur.close()
+            pool.putconn(conn)
+            raise
+        cur.close()
+        pool.putconn(conn)
+        return result
+
+    def _aggregate_sql(self):
+        parts = [self._select_cols] if self._select_cols else []
+        for alias, func, column in self._aggregates:
+            target = f'"{column}"' if column else "*"
+            parts.append(f'{func.upper()}({target}) AS "{alias}"')
+        return ", ".join(parts)
+
+    def _statement(self, sql):
+        return PreparedSQL(sql) if self._preparable else sql
+
+    def _count_plan(self):
+        sql = _count_statement(self.table_name, tuple(self._where_clauses))
+        rows = yield self._statement(sql), self._where_values
+        return rows[0]["count"]
+
+    def _projection(self):
+        """
+        메인 테이블 SELECT 컬럼과, 내부적으로만 필요해 결과에서 지울 컬럼 목록
+        (조인 FK 컬럼, 페이지네이션 키는 요청하지 않았어도 조회해야 함)
+        """
+        required = [embed.local_column for embed in self._joins]
+        required += self._page_columns or []
+        return _projection_list(self._select_cols, tuple(required))
+
+    def _select_sql(self):
+        """select 연산의 (sql, params) 생성. 같은 형태의 쿼리는 캐시된 SQL 문자열 재사용"""
+        # 조인 테이블은 _embeds_plan에서 배치 로드하므로 메인 테이블만 조회
+        if self._aggregates:
+            select_list = self._aggregate_sql()
+        else:
+            select_list = self._projection()[0]
+        sql = _select_statement(
+            self.table_name,
+            select_list,
+            tuple(self._where_clauses),
+            self._group_by_columns(),
+            tuple(self._orders),
+            self._limit,
+            self._offset,
+        )
+        return self._statement(sql), self._where_values
+
+    def _group_by_columns(self):
+        if not self._aggregates:
+            return ()
+        if self._group_by is not None:
+            return tuple(self._group_by)
+        return tuple(c.strip() for c in self._select_cols.split(",") if c.strip())
+
+    def _resolve_joins_plan(self):
+        """임베드마다 FK 관계(방향, 조인 컬럼) 결정"""
+        relationships = yield from _relationships_plan()
+        for embed in self._joins:
+            embed.resolve(relationships, self.table_name)
+
+    def _embeds_plan(self, rows, embeds, cache):
+        """
+        배치 쿼리로 조인 데이터 가져오기 (N+1 문제 해결)
+        임베드 단계마다 = ANY(배열) 쿼리 1회. 하위 임베드는 새로 읽은 행에 대해서만 재귀 로드
+        cache: {(table, 조인 컬럼, select_list): {조인 값: 행 또는 행 리스트}}
+        — 같은 쿼리(스트림 포함) 안에서 이미 읽은 행 재사용
+        """
+        for embed in embeds:
+            select_list = embed.select_list()
+            loaded = cache.setdefault((embed.table, embed.remote_column, select_list), {})
+
+            # 아직 읽지 않은 조인 값만 수집
+            keys = {r.get(embed.local_column) for r in rows} - {None}
+            missing = list(keys - loaded.keys())
+            if missing:
+                clause, params = any_clause(f'"{embed.remote_column}"', missing)
+                fetched = yield PreparedSQL(f'SELECT {select_list} FROM "{embed.table}" WHERE {clause}'), params
+                new_rows = [dict(row) for row in fetched]
+                if embed.embeds:
+                    yield from self._embeds_plan(new_rows, embed.embeds, cache)
+                # 매핑 키는 숨김 컬럼을 지우기 전에 묶어둠
+                grouped = {}
+                for row in new_rows:
+                    grouped.setdefault(row[embed.remote_column], []).append(row)
+                _drop_columns(new_rows, embed.hidden_columns())
+                # 없는 값도 기록해 다시 조회하지 않음
+                for key in missing:
+                    matched = grouped.get(key, [])
+                    loaded[key] = matched if embed.many else (matched[0] if matched else None)
+
+            # 결과에 매핑 (다대일은 객체, 일대다는 배열)
+            for r in rows:
+                key = r.get(embed.local_column)
+                if key is None:
+                    r[embed.key_name] = [] if embed.many else None
+                else:
+                    r[embed.key_name] = loaded[key]
+
+    def _run(self, cur, retries=0):
+        return run_plan(self._plan(), cur, retries)
+
+    def _plan(self):
+        """
+        연산 실행 플랜 (run_plan 참고). 결과 행은 dict 커서 기준
+        동기 클라이언트와 async 클라이언트가 같은 플랜을 실행
+        """
+        if self._operation == "select":
+            if self._page_cursor is not None:
+                yield from self._cursor_values_plan()
+            count = (yield from self._count_plan()) if self._count else None
+            if self._head:
+                return QueryResult([], count=count)
+
+            if self._joins:
+                yield from self._resolve_joins_plan()
+            results = [dict(row) for row in (yield self._select_sql())]
+            if self._joins:
+                yield from self._embeds_plan(results, self._joins, {})
+
+            next_cursor = None
+            if self._page_size is not None and len(results) > self._page_size:
+                results = results[:self._page_size]
+                next_cursor = encode_cursor(serialize_row(results[-1]), self._page_columns)
+            _drop_columns(results, self._projection()[1])
+
+            result = QueryResult(results, count=count, serialize=self._serialize)
+            result.next_cursor = next_cursor
+            if self._single:
+                result.data = result.data[0] if result.data else None
+            return result
+
+        elif self._operation == "insert":
+            if isinstance(self._insert_data, list) or self._on_conflict:
+                # Bulk insert / upsert: 다중 행 VALUES로 페이지당 1회 왕복
+                rows = self._insert_data if isinstance(self._insert_data, list) else [self._insert_data]
+                if not rows:
+                    return QueryResult([])
+                return QueryResult((yield from self._bulk_insert_plan(rows)))
+            else:
+                # Single insert
+                returning = self._returning != "minimal"
+                sql = _insert_statement(self.table_name, tuple(self._insert_data.keys()), returning)
+                rows = yield self._statement(sql), list(self._insert_data.values())
+                if not returning:
+                    return QueryResult([])
+                return QueryResult([dict(rows[0])] if rows else [])
+
+        elif self._operation == "update":
+            sql = _update_statement(self.table_name, tuple(self._update_data.keys()), tuple(self._where_clauses))
+            rows = yield self._statement(sql), list(self._update_data.values()) + self._where_values
+            return QueryResult([dict(row) for row in rows])
+
+        elif self._operation == "update_many":
+            if not self._update_rows:
+                return QueryResult([])
+            return QueryResult((yield from self._bulk_update_plan(self._update_rows)))
+
+        elif self._operation == "delete":
+            sql = _delete_statement(self.table_name, tuple(self._where_clauses))
+            rows = yield self._statement(sql), self._where_values
+            return QueryResult([dict(row) for row in rows])
+
+    def _cursor_values_plan(self):
+        """paginate() 커서 값을 정렬 컬럼 타입으로 검증·변환 (잘못된 값이 DB 오류 / 재시도로 가지 않도록)"""
+        col_types = yield from _column_types_plan(self.table_name)
+        start, cursor = self._page_cursor
+        values = decode_cursor(cursor, [col_types.get(c) for c in self._page_columns])
+        self._where_values[start:start + len(values)] = values
+
+    def _bulk_update_plan(self, rows):
+        key = self._update_key
+        deduped = {}
+        for row in rows:
+            deduped[row[key]] = row
+        # 컬럼 구성별로 묶어 그룹당 한 문장 (없는 컬럼을 NULL로 덮어쓰지 않도록)
+        groups = {}
+        for row in deduped.values():
+            cols = tuple(c for c in row.keys() if c != key)
+            if cols:
+                groups.setdefault(cols, []).append(row)
+        if not groups:
+            return []
+
+        col_types = yield from _column_types_plan(self.table_name)
+        multi_statement = len(groups) > 1 or len(deduped) > BULK_INSERT_PAGE_SIZE
+        if multi_statement:
+            yield "BEGIN", None
+        updated = []
+        for cols, group in groups.items():
+            all_cols = (key,) + cols
+            col_names = ", ".join(f'"{c}"' for c in all_cols)
+            set_clause = ", ".join(f'"{c}" = v."{c}"' for c in cols)
+            # VALUES 리터럴은 text로 해석되므로 테이블 컬럼 타입으로 명시 캐스팅
+            template = "(" + ", ".join(f"%s::{col_types[c]}" for c in all_cols) + ")"
+            values = [[row.get(c) for c in all_cols] for row in group]
+            for values_sql, params in _values_pages(values, template):
+                result = yield (
+                    f'UPDATE "{self.table_name}" AS t SET {set_clause} '
+                    f'FROM (VALUES {values_sql}) AS v ({col_names}) '
+                    f'WHERE t."{key}" = v."{key}" RETURNING t.*',
+                    params,
+                )
+                updated.extend(dict(row) for row in result)
+        if multi_statement:
+            yield "COMMIT", None
+        return updated
+
+    def _bulk_insert_plan(self, rows):
+        # 행마다 키가 다를 수 있으므로 전체 키의 합집합을 컬럼으로 사용 (없는 값은 NULL)
+        cols = list(dict.fromkeys(c for row in rows for c in row.keys()))
+        col_names = ", ".join(f'"{c}"' for c in cols)
+        # ON CONFLICT / RETURNING 절 (페이지마다 VALUES 뒤에 붙임)
+        suffix = ""
+        if self._on_conflict:
+            # 한 문장 안에서 같은 키가 두 번 나오면 DO UPDATE가 실패하므로 마지막 값만 남김
+            # (키가 비어 있는 행은 충돌할 수 없으므로 그대로 둠)
+            deduped = {}
+            for i, row in enumerate(rows):
+                key = tuple(row.get(c) for c in self._on_conflict)
+                deduped[i if None in key else key] = row
+            rows = list(deduped.values())
+            suffix += " ON CONFLICT (" + ", ".join(f'"{c}"' for c in self._on_conflict) + ")"
+            update_cols = [c for c in cols if c not in self._on_conflict]
+            if self._ignore_duplicates or not update_cols:
+                suffix += " DO NOTHING"
+            else:
+                suffix += " DO UPDATE SET " + ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in update_cols)
+        returning = self._returning != "minimal"
+        if returning:
+            suffix += " RETURNING *"
+        values = [[row.get(c) for c in cols] for row in rows]
+
+        # 여러 페이지로 나뉘면 부분 insert 후 재시도로 중복되지 않도록 한 트랜잭션으로 묶음
+        multi_page = len(values) > BULK_INSERT_PAGE_SIZE
+        if multi_page:
+            yield "BEGIN", None
+        # 단일 INSERT ... VALUES의 RETURNING은 입력 순서대로 행을 돌려줌
+        template = "(" + ", ".join(["%s"] * len(cols)) + ")"
+        inserted = []
+        for values_sql, params in _values_pages(values, template):
+            result = yield f'INSERT INTO "{self.table_name}" ({col_names}) VALUES {values_sql}{suffix}', params
+            if returning:
+                inserted.extend(dict(row) for row in result)
+        if multi_page:
+            yield "COMMIT", None
+        return inserted
 
 
 class PostgresClient:
@@ -0,0 +1,58 @@
+import argparse
+from db import get_connection
+from checklists.utm_codes import CHECKLIST_UTM_CODES_TABLE
+
+# checklists.utm_code (JSON 배열 문자열)을 (checklist_id, utm_code) 행으로 정규화한 테이블
+# 기존 데이터는 ad_performance.utm_code_list()로 펼쳐서 채움 (migrate_utm_code_list.py 선행)
+# 이후에는 utm_code를 쓰는 곳이 checklists/utm_codes.py execute_with_utm_codes로 같은 트랜잭션에서 함께 기록
+STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHECKLIST_UTM_CODES_TABLE} (
+        checklist_id UUID NOT NULL REFERENCES checklists(id) ON DELETE CASCADE,
+        utm_code TEXT NOT NULL,
+        position INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (checklist_id, utm_code)
+    );
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_checklist_utm_codes_utm_code ON {CHECKLIST_UTM_CODES_TABLE} (utm_code, checklist_id);",
+    f"""
+    INSERT INTO {CHECKLIST_UTM_CODES_TABLE} (checklist_id, utm_code, position)
+    SELECT DISTINCT ON (c.id, u.utm_code) c.id, u.utm_code, u.position - 1
+    FROM checklists c
+    CROSS JOIN LATERAL ad_performance.utm_code_list(c.utm_code) WITH ORDINALITY AS u(utm_code, position)
+    WHERE c.utm_code IS NOT NULL AND c.utm_code != ''
+      AND u.utm_code IS NOT NULL AND u.utm_code != ''
+    ORDER BY c.id, u.utm_code, u.position
+    ON CONFLICT (checklist_id, utm_code) DO UPDATE SET position = EXCLUDED.position;
+    """,
+    f"ANALYZE {CHECKLIST_UTM_CODES_TABLE};",
+]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add checklist_utm_codes table and backfill it from checklists.utm_code")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
@@ -0,0 +1,41 @@
+import argparse
+from db import get_connection
+
+# keyset 페이지네이션 (정렬 키, id) 인덱스
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_copies_created_at_id ON copies (created_at DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_checklists_created_at_id ON checklists (created_at DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_checklists_updated_at_id ON checklists (updated_at DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_team_products_created_at_id ON team_products (created_at DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users (created_at DESC, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at_id ON audit_logs (created_at DESC, id DESC);",
+]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(INDEXES, 1):
+        print(f"[{i}/{len(INDEXES)}] {sql}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add (sort key, id) indexes for keyset pagination")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
@@ -0,0 +1,57 @@
+import argparse
+from db import get_connection
+
+# checklists.utm_code (JSON 배열 문자열)을 UTM 코드 행으로 펼치는 SQL 함수
+# Python 쪽 파싱과 동일: 배열이면 원소, 배열이 아닌 JSON이면 그 값, JSON이 아니면 원문 그대로
+STATEMENTS = [
+    """
+    CREATE OR REPLACE FUNCTION ad_performance.utm_code_list(raw TEXT) RETURNS SETOF TEXT
+    LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+    AS $$
+    DECLARE
+        parsed jsonb;
+    BEGIN
+        BEGIN
+            parsed := raw::jsonb;
+        EXCEPTION WHEN invalid_text_representation THEN
+            RETURN NEXT raw;
+            RETURN;
+        END;
+        IF jsonb_typeof(parsed) = 'array' THEN
+            RETURN QUERY SELECT jsonb_array_elements_text(parsed);
+        ELSE
+            RETURN NEXT parsed #>> '{}';
+        END IF;
+    END;
+    $$;
+    """,
+]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add ad_performance.utm_code_list() for expanding checklist utm_code JSON")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
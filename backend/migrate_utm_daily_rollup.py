@@ -0,0 +1,103 @@
+import argparse
+from db import get_connection
+from ad_performance.refresh_rollup import DIRTY_DATES_TABLE
+from ad_performance.utm import UTM_ROLLUP_TABLE
+
+# 정규화 UTM 코드별 일 집계 테이블과, 원본이 바뀐 날짜를 기록하는 트리거
+# 롤업 갱신은 ad_performance/refresh_rollup.py (api 스케줄러가 주기적으로 실행)
+# 기존 날짜는 모두 dirty로 등록만 하고, 월 집계 / 소진 상태 테이블까지 만든 뒤 갱신이 한 번에 채움
+SOURCE_TABLES = ["ad_performance.meta_daily_perform", "ad_performance.cafe24_daily_perform"]
+
+STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {UTM_ROLLUP_TABLE} (
+        utm_code TEXT NOT NULL,
+        date DATE NOT NULL,
+        spend NUMERIC NOT NULL DEFAULT 0,
+        impressions BIGINT NOT NULL DEFAULT 0,
+        clicks BIGINT NOT NULL DEFAULT 0,
+        meta_records INTEGER NOT NULL DEFAULT 0,
+        revenue NUMERIC NOT NULL DEFAULT 0,
+        conversions BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (utm_code, date)
+    );
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_utm_daily_rollup_date ON {UTM_ROLLUP_TABLE} (date);",
+    f"CREATE TABLE IF NOT EXISTS {DIRTY_DATES_TABLE} (date DATE PRIMARY KEY);",
+    f"""
+    INSERT INTO {DIRTY_DATES_TABLE} (date)
+    SELECT date FROM ad_performance.meta_daily_perform WHERE date IS NOT NULL
+    UNION
+    SELECT date FROM ad_performance.cafe24_daily_perform WHERE date IS NOT NULL
+    ON CONFLICT (date) DO NOTHING;
+    """,
+    # 이미 dirty인 날짜도 DO UPDATE로 행 잠금을 잡아 쓰기 트랜잭션이 끝날 때까지 유지
+    # (갱신은 잠긴 날짜를 건너뛰므로, 커밋 전 변경분이 집계에서 빠진 채 dirty 표시만 지워지지 않음)
+    f"""
+    CREATE OR REPLACE FUNCTION ad_performance.mark_utm_rollup_dirty() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {DIRTY_DATES_TABLE} (date)
+            SELECT DISTINCT date FROM new_rows WHERE date IS NOT NULL ORDER BY date
+            ON CONFLICT (date) DO UPDATE SET date = EXCLUDED.date;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO {DIRTY_DATES_TABLE} (date)
+            SELECT DISTINCT date FROM old_rows WHERE date IS NOT NULL ORDER BY date
+            ON CONFLICT (date) DO UPDATE SET date = EXCLUDED.date;
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+    """,
+]
+for source in SOURCE_TABLES:
+    name = source.split(".")[1]
+    for event, transition in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        trigger = f"trg_{name}_rollup_dirty_{event.lower()}"
+        STATEMENTS += [
+            f"DROP TRIGGER IF EXISTS {trigger} ON {source};",
+            f"""
+            CREATE TRIGGER {trigger} AFTER {event} ON {source}
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION ad_performance.mark_utm_rollup_dirty();
+            """,
+        ]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+    if not dry_run:
+        print("\nAll dates queued. Run migrate_utm_monthly_rollup.py / migrate_utm_spend_state.py, then ad_performance/refresh_rollup.py")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add utm_daily_rollup table and dirty-date triggers, and queue every date for refresh")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
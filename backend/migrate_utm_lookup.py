@@ -0,0 +1,94 @@
+import argparse
+from db import get_connection
+from ad_performance.utm import AD_CODE_UTM_TABLE, NORMALIZE_UTM_SQL
+
+# 정규화 UTM 규칙(ad_performance/utm.py)을 SQL 함수로 정의하고 ad_code -> utm_code 조회 테이블을 유지
+# meta / cafe24 테이블에 insert / update가 일어나면 트리거가 새 ad_code를 조회 테이블에 등록
+SOURCE_TABLES = ["ad_performance.meta_daily_perform", "ad_performance.cafe24_daily_perform"]
+
+STATEMENTS = [
+    f"""
+    CREATE OR REPLACE FUNCTION ad_performance.normalize_utm_code(ad_code TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT {NORMALIZE_UTM_SQL} $$;
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {AD_CODE_UTM_TABLE} (
+        ad_code TEXT PRIMARY KEY,
+        utm_code TEXT NOT NULL
+    );
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_ad_code_utm_utm_code ON {AD_CODE_UTM_TABLE} (utm_code, ad_code);",
+    f"""
+    CREATE OR REPLACE FUNCTION ad_performance.register_ad_code_utm() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        INSERT INTO {AD_CODE_UTM_TABLE} (ad_code, utm_code)
+        SELECT DISTINCT ad_code, ad_performance.normalize_utm_code(ad_code)
+        FROM new_rows
+        WHERE ad_code IS NOT NULL
+        ON CONFLICT (ad_code) DO NOTHING;
+        RETURN NULL;
+    END
+    $$;
+    """,
+]
+for source in SOURCE_TABLES:
+    name = source.split(".")[1]
+    # transition table을 쓰는 트리거는 이벤트 하나만 지정할 수 있으므로 insert / update 각각 생성
+    for event in ("INSERT", "UPDATE"):
+        trigger = f"trg_{name}_ad_code_utm_{event.lower()}"
+        STATEMENTS += [
+            f"DROP TRIGGER IF EXISTS {trigger} ON {source};",
+            f"""
+            CREATE TRIGGER {trigger} AFTER {event} ON {source}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION ad_performance.register_ad_code_utm();
+            """,
+        ]
+    STATEMENTS.append(f"CREATE INDEX IF NOT EXISTS idx_{name}_ad_code_date ON {source} (ad_code, date);")
+STATEMENTS += [
+    # 기존 ad_code 백필 (규칙이 바뀌어 다시 실행하면 utm_code도 다시 계산)
+    f"""
+    INSERT INTO {AD_CODE_UTM_TABLE} (ad_code, utm_code)
+    SELECT ad_code, ad_performance.normalize_utm_code(ad_code)
+    FROM (
+        SELECT ad_code FROM ad_performance.meta_daily_perform
+        UNION
+        SELECT ad_code FROM ad_performance.cafe24_daily_perform
+    ) codes
+    WHERE ad_code IS NOT NULL
+    ON CONFLICT (ad_code) DO UPDATE SET utm_code = EXCLUDED.utm_code;
+    """,
+    f"ANALYZE {AD_CODE_UTM_TABLE};",
+] + [f"ANALYZE {source};" for source in SOURCE_TABLES]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add canonical UTM normalization function and ad_code -> utm_code lookup table")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
@@ -0,0 +1,60 @@
+import argparse
+from db import get_connection
+from ad_performance.utm import UTM_MONTHLY_ROLLUP_TABLE, UTM_ROLLUP_TABLE
+
+# 정규화 UTM 코드별 월 합계 (마감된 월의 성과 조회용 캐시)
+# 이후에는 ad_performance/refresh_rollup.py가 일 롤업과 함께 바뀐 월만 다시 집계
+STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {UTM_MONTHLY_ROLLUP_TABLE} (
+        utm_code TEXT NOT NULL,
+        month DATE NOT NULL,
+        spend NUMERIC NOT NULL DEFAULT 0,
+        impressions BIGINT NOT NULL DEFAULT 0,
+        clicks BIGINT NOT NULL DEFAULT 0,
+        meta_records INTEGER NOT NULL DEFAULT 0,
+        revenue NUMERIC NOT NULL DEFAULT 0,
+        conversions BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (utm_code, month)
+    );
+    """,
+    f"DELETE FROM {UTM_MONTHLY_ROLLUP_TABLE};",
+    f"""
+    INSERT INTO {UTM_MONTHLY_ROLLUP_TABLE}
+        (utm_code, month, spend, impressions, clicks, meta_records, revenue, conversions)
+    SELECT utm_code, date_trunc('month', date)::date, SUM(spend), SUM(impressions), SUM(clicks),
+        SUM(meta_records), SUM(revenue), SUM(conversions)
+    FROM {UTM_ROLLUP_TABLE}
+    GROUP BY 1, 2;
+    """,
+    f"ANALYZE {UTM_MONTHLY_ROLLUP_TABLE};",
+]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add utm_monthly_rollup and backfill it from utm_daily_rollup")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
@@ -0,0 +1,62 @@
+import argparse
+from db import get_connection
+from ad_performance.utm import UTM_ROLLUP_TABLE, UTM_SPEND_STATE_TABLE
+
+# 정규화 UTM 코드별 광고비 소진 상태 (daily_alive_check의 alive / dead / 신규 판정용)
+# 이후에는 ad_performance/refresh_rollup.py가 바뀐 날짜분만 반영
+STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {UTM_SPEND_STATE_TABLE} (
+        utm_code TEXT PRIMARY KEY,
+        first_spend_date DATE,
+        last_spend_date DATE,
+        lifetime_spend NUMERIC NOT NULL DEFAULT 0,
+        last_checked DATE
+    );
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_utm_spend_state_first_spend_date ON {UTM_SPEND_STATE_TABLE} (first_spend_date);",
+    f"CREATE INDEX IF NOT EXISTS idx_utm_spend_state_last_spend_date ON {UTM_SPEND_STATE_TABLE} (last_spend_date);",
+    # 롤업 갱신과 겹치지 않도록 같은 advisory lock 안에서 채움
+    f"SELECT pg_advisory_xact_lock(hashtext('{UTM_ROLLUP_TABLE}'));",
+    f"DELETE FROM {UTM_SPEND_STATE_TABLE};",
+    f"""
+    INSERT INTO {UTM_SPEND_STATE_TABLE} (utm_code, first_spend_date, last_spend_date, lifetime_spend, last_checked)
+    SELECT utm_code,
+        MIN(date) FILTER (WHERE spend > 0),
+        MAX(date) FILTER (WHERE spend > 0),
+        SUM(spend),
+        MAX(date)
+    FROM {UTM_ROLLUP_TABLE}
+    GROUP BY utm_code;
+    """,
+    f"ANALYZE {UTM_SPEND_STATE_TABLE};",
+]
+
+
+def main(dry_run: bool = False):
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+
+    for i, sql in enumerate(STATEMENTS, 1):
+        print(f"[{i}/{len(STATEMENTS)}] {' '.join(sql.split())[:120]}")
+        cur.execute(sql)
+        print("  -> done")
+
+    if dry_run:
+        conn.rollback()
+        print("\n[DRY RUN] All changes rolled back.")
+    else:
+        conn.commit()
+        print("\nMigration completed successfully.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add utm_spend_state and backfill it from utm_daily_rollup")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back instead of commit")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
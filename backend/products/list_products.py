@@ -7,7 +7,7 @@ from conn import get_supabase_client
 
 def list_products():
     client = get_supabase_client()
-    response = client.table("products").select("*").order("created_at", desc=True).execute()
+    response = client.table("products").select("*").order("created_at", desc=True).native_types().execute()
     return response.data
 
 
@@ -0,0 +1,216 @@
+"""
+쿼리 계측: SQL fingerprint별 호출 수 / 시간 히스토그램 / 행 수 / 재시도, 슬로우 쿼리 로그
+요청 단위 집계(Server-Timing 헤더)와 테스트용 쿼리 수 검사(assert_max_queries)
+db.run_plan, async_db.run_plan_async, QueryBuilder.stream에서 record_query 호출
+"""
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+# 이 시간(ms) 이상 걸린 쿼리는 로그 출력 (0이면 끔)
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", 500))
+# 추적할 fingerprint 최대 개수 (넘으면 새 fingerprint는 "(other)"로 합산)
+MAX_FINGERPRINTS = int(os.environ.get("DB_QUERY_STATS_MAX", 500))
+# 히스토그램 버킷 상한 (ms)
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 현재 쿼리를 실행 중인 엔드포인트 (미들웨어에서 설정, 스케줄러 작업 등은 None)
+_current_endpoint = ContextVar("query_endpoint", default=None)
+
+# 현재 요청의 쿼리 집계 (track_request_queries 안에서만 설정)
+_current_request = ContextVar("query_request", default=None)
+
+# capture_queries가 수집 중인 목록 (현재 컨텍스트, 중첩 가능 — 테스트용)
+_current_captures = ContextVar("query_captures", default=())
+
+_lock = threading.Lock()
+_stats = {}
+
+
+class RequestQueries:
+    """요청 하나에서 실행된 쿼리 수 / 행 수 / DB 시간"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_ms = 0.0
+
+    def server_timing(self):
+        """Server-Timing 헤더 값 (예: db;desc="3 queries, 48 rows";dur=4.2)"""
+        return f'db;desc="{self.queries} queries, {self.rows} rows";dur={self.db_ms:.1f}'
+
+
+def set_query_endpoint(endpoint):
+    """현재 컨텍스트의 엔드포인트 라벨 설정. 반환된 토큰으로 reset_query_endpoint"""
+    return _current_endpoint.set(endpoint)
+
+
+def reset_query_endpoint(token):
+    _current_endpoint.reset(token)
+
+
+@contextmanager
+def track_request_queries():
+    """
+    블록 안(같은 컨텍스트)에서 실행된 쿼리를 집계
+    with track_request_queries() as queries: ... queries.server_timing()
+    """
+    queries = RequestQueries()
+    token = _current_request.set(queries)
+    try:
+        yield queries
+    finally:
+        _current_request.reset(token)
+
+
+@contextmanager
+def capture_queries():
+    """
+    블록 안(같은 컨텍스트)에서 실행된 쿼리의 fingerprint 목록 (테스트용)
+    track_request_queries처럼 컨텍스트 변수로 범위를 정하므로 스케줄러 작업이나 다른 스레드의 쿼리는 섞이지 않음
+    TestClient 요청은 호출한 쪽 컨텍스트를 복사해 실행되므로 엔드포인트 쿼리도 수집됨
+    """
+    captured = []
+    token = _current_captures.set(_current_captures.get() + (captured,))
+    try:
+        yield captured
+    finally:
+        _current_captures.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """
+    블록 안의 쿼리 수가 limit을 넘으면 AssertionError (N+1 회귀 검사)
+    with assert_max_queries(3):
+        client.get("/api/copies")
+    """
+    with capture_queries() as captured:
+        yield captured
+    if len(captured) > limit:
+        listing = "\n".join(f"  {i + 1}. {sql[:200]}" for i, sql in enumerate(captured))
+        raise AssertionError(f"Expected at most {limit} queries, got {len(captured)}:\n{listing}")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    SQL 정규화: 리터럴/파라미터는 ?, IN 목록과 VALUES 행 반복은 하나로 접음
+    "WHERE id IN (%s,%s,%s)" -> "WHERE id IN (?, ...)"
+    """
+    text = re.sub(r"--[^\n]*", " ", sql)
+    text = re.sub(r"'(?:[^']|'')*'", "?", text)
+    text = text.replace("%s", "?")
+    text = re.sub(r"(?<![\w\"])\d+(?:\.\d+)?\b", "?", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = re.sub(r"\bIN \(\?(?:\s*,\s*\?)+\)", "IN (?, ...)", text, flags=re.I)
+    text = re.sub(r"(\([^()]*\))(?:\s*,\s*\1)+", r"\1, ...", text)
+    return text
+
+
+def _bucket_index(duration_ms):
+    for i, upper in enumerate(HISTOGRAM_BUCKETS_MS):
+        if duration_ms <= upper:
+            return i
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def record_query(sql, duration, rows=None, retries=0):
+    """
+    쿼리 1회 기록
+    duration: 초, rows: 반환/영향 행 수 (모르면 None), retries: 커넥션 재시도 횟수
+    """
+    duration_ms = duration * 1000
+    key = fingerprint(sql)
+    endpoint = _current_endpoint.get() or "(background)"
+    request = _current_request.get()
+    if request is not None:
+        request.queries += 1
+        request.rows += max(rows or 0, 0)
+        request.db_ms += duration_ms
+    for captured in _current_captures.get():
+        captured.append(key)
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= MAX_FINGERPRINTS:
+                key = "(other)"
+                entry = _stats.get(key)
+            if entry is None:
+                entry = _stats[key] = {
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "retries": 0,
+                    "slow": 0,
+                    "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+                    "endpoints": {},
+                }
+        entry["calls"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["rows"] += max(rows or 0, 0)
+        entry["retries"] += retries
+        entry["buckets"][_bucket_index(duration_ms)] += 1
+        entry["endpoints"][endpoint] = entry["endpoints"].get(endpoint, 0) + 1
+        slow = SLOW_QUERY_MS > 0 and duration_ms >= SLOW_QUERY_MS
+        if slow:
+            entry["slow"] += 1
+
+    if slow:
+        print(
+            f"[slow query] {duration_ms:.0f}ms rows={rows} retries={retries} "
+            f"endpoint={endpoint} sql={key[:500]}"
+        )
+
+
+def _percentile(buckets, calls, fraction):
+    """히스토그램 버킷으로 백분위 추정 (해당 버킷 상한값)"""
+    target = calls * fraction
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= target:
+            return HISTOGRAM_BUCKETS_MS[i] if i < len(HISTOGRAM_BUCKETS_MS) else None
+    return None
+
+
+def get_query_stats(sort="total_ms", limit=50):
+    """fingerprint별 통계 (sort 기준 내림차순 상위 limit개)"""
+    if sort not in ("total_ms", "calls", "max_ms", "avg_ms", "rows", "slow"):
+        raise ValueError(f"Unsupported sort key: {sort}")
+    with _lock:
+        snapshot = [(key, {**entry, "buckets": list(entry["buckets"]), "endpoints": dict(entry["endpoints"])})
+                    for key, entry in _stats.items()]
+
+    result = []
+    for key, entry in snapshot:
+        calls = entry["calls"]
+        result.append({
+            "fingerprint": key,
+            "calls": calls,
+            "total_ms": round(entry["total_ms"], 1),
+            "avg_ms": round(entry["total_ms"] / calls, 2),
+            "max_ms": round(entry["max_ms"], 1),
+            "p50_ms": _percentile(entry["buckets"], calls, 0.5),
+            "p95_ms": _percentile(entry["buckets"], calls, 0.95),
+            "rows": entry["rows"],
+            "retries": entry["retries"],
+            "slow": entry["slow"],
+            "histogram": {
+                f"le_{upper}ms": count
+                for upper, count in zip(HISTOGRAM_BUCKETS_MS, entry["buckets"])
+            } | {"gt_max": entry["buckets"][-1]},
+            "endpoints": entry["endpoints"],
+        })
+    result.sort(key=lambda item: item[sort], reverse=True)
+    return {"slow_query_ms": SLOW_QUERY_MS, "fingerprints": len(result), "queries": result[:limit]}
+
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
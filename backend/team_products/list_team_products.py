@@ -5,15 +5,25 @@ sys.path.insert(0, sys.path[0] + "/..")
 from conn import get_supabase_client
 
 
-def list_team_products(team_id: str = None):
+def _team_products_query(team_id: str = None):
     client = get_supabase_client()
-    query = client.table("team_products").select("*, teams(*), products(*)")
+    query = client.table("team_products").select("*, teams(id, name), products(id, name)")
     if team_id:
         query = query.eq("team_id", team_id)
-    response = query.order("created_at", desc=True).execute()
+    return query.native_types()
+
+
+def list_team_products(team_id: str = None):
+    response = _team_products_query(team_id).order("created_at", desc=True).execute()
     return response.data
 
 
+def list_team_products_page(team_id: str = None, cursor: str = None, limit: int = 50):
+    """created_at 내림차순 keyset 페이지 ({data, next_cursor})"""
+    response = _team_products_query(team_id).paginate(cursor, limit).execute()
+    return {"data": response.data, "next_cursor": response.next_cursor}
+
+
 def main(team_id: str = None):
     result = list_team_products(team_id)
     print(f"Found {len(result)} team-product assignments")
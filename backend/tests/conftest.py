@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def test_db(monkeypatch):
+    """
+    TEST_DB_NAME에 지정한 테스트 전용 DB로 db 모듈의 커넥션 풀을 연결 (없으면 skip)
+    테스트가 테이블을 만들고 행을 쓰므로 운영 DB 이름을 지정하지 말 것
+    """
+    name = os.environ.get("TEST_DB_NAME")
+    if not name:
+        pytest.skip("TEST_DB_NAME is not set")
+    monkeypatch.setenv("DB_NAME", name)
+    monkeypatch.setattr(db, "_pool", None)
+    # 다른 DB에서 읽은 스키마 캐시를 쓰지 않도록
+    monkeypatch.setattr(db, "_relationships_cache", {})
+    monkeypatch.setattr(db, "_column_types_cache", {})
+    yield
+    if db._pool is not None:
+        db._pool.closeall()
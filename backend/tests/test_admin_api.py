@@ -0,0 +1,28 @@
+import pytest
+from fastapi import HTTPException
+
+import api
+
+
+def test_db_admin_routes_are_not_registered_by_default():
+    if api.DB_ADMIN_API:
+        pytest.skip("DB_ADMIN_API is enabled in this environment")
+    paths = {getattr(route, "path", None) for route in api.app.routes}
+    assert "/api/admin/query-stats" not in paths
+    assert "/api/admin/db-pool" not in paths
+
+
+@pytest.mark.parametrize(
+    "authorization, role, status_code",
+    [(None, None, 401), ("Bearer u1:token", "user", 403), ("Bearer u1:token", "leader", 403)],
+)
+def test_require_admin_rejects_non_admins(monkeypatch, authorization, role, status_code):
+    monkeypatch.setattr(api, "get_current_user", lambda token: {"id": "u1", "role": role})
+    with pytest.raises(HTTPException) as excinfo:
+        api.require_admin(authorization)
+    assert excinfo.value.status_code == status_code
+
+
+def test_require_admin_returns_admin_user(monkeypatch):
+    monkeypatch.setattr(api, "get_current_user", lambda token: {"id": token.split(":")[0], "role": "admin"})
+    assert api.require_admin("Bearer u1:token")["id"] == "u1"
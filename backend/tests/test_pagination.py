@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db
+from db import QueryBuilder, decode_cursor, encode_cursor
+
+COPIES_TYPES = [
+    {"attname": "id", "type": "uuid"},
+    {"attname": "created_at", "type": "timestamp with time zone"},
+    {"attname": "title", "type": "text"},
+]
+ROW_ID = "0b5f7c3e-8d2a-4f4b-9a39-3f1a6c2d9e10"
+
+
+@pytest.fixture(autouse=True)
+def empty_column_types(monkeypatch):
+    monkeypatch.setattr(db, "_column_types_cache", {})
+
+
+def _page_plan(cursor):
+    """copies 페이지 조회 플랜을 컬럼 타입 조회까지 진행하고, 다음에 보낼 (sql, params)를 받음"""
+    plan = QueryBuilder("copies").select("id, title").paginate(cursor, page_size=10).plan()
+    sql, _ = next(plan)
+    assert "pg_attribute" in sql
+    return plan.send(COPIES_TYPES)
+
+
+def test_cursor_values_are_coerced_to_column_types():
+    cursor = encode_cursor({"created_at": "2024-05-01T09:30:00+00:00", "id": ROW_ID}, ["created_at", "id"])
+    sql, params = _page_plan(cursor)
+    assert '("created_at", "id") < (%s, %s)' in sql
+    assert params == [datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc), ROW_ID]
+
+
+@pytest.mark.parametrize("values", [["yesterday", ROW_ID], ["2024-05-01T09:30:00", "not-a-uuid"], [1, ROW_ID]])
+def test_malformed_cursor_values_are_rejected_before_the_query(values):
+    cursor = encode_cursor(dict(zip(["created_at", "id"], values)), ["created_at", "id"])
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        _page_plan(cursor)
+
+
+def test_decode_cursor_checks_value_count_against_types():
+    cursor = encode_cursor({"id": ROW_ID}, ["id"])
+    with pytest.raises(ValueError, match="Cursor does not match"):
+        decode_cursor(cursor, ["timestamp with time zone", "uuid"])
+
+
+@pytest.mark.parametrize("page_size", [0, -1])
+def test_paginate_rejects_empty_pages(page_size):
+    with pytest.raises(ValueError, match="page_size"):
+        QueryBuilder("copies").paginate(page_size=page_size)
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1000000])
+def test_page_endpoints_bound_limit(limit):
+    from api import app
+
+    response = TestClient(app).get("/api/copies/page", params={"limit": limit})
+    assert response.status_code == 422
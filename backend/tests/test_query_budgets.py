@@ -0,0 +1,95 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api import app
+from db import get_connection, load_relationships
+from query_stats import assert_max_queries
+
+# 임베드에 필요한 컬럼과 FK만 있는 최소 스키마 (테스트 DB에 없을 때만 생성)
+SCHEMA_STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS products (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), name TEXT);",
+    "CREATE TABLE IF NOT EXISTS copy_types (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), code TEXT, name TEXT);",
+    """
+    CREATE TABLE IF NOT EXISTS copies (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        product_id UUID REFERENCES products(id),
+        copy_type_id UUID REFERENCES copy_types(id),
+        content TEXT,
+        created_at TIMESTAMPTZ DEFAULT now()
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS checklists (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        week TEXT,
+        team_id UUID,
+        product_id UUID REFERENCES products(id),
+        copy_type_id UUID REFERENCES copy_types(id),
+        utm_code TEXT,
+        created_at TIMESTAMPTZ DEFAULT now(),
+        updated_at TIMESTAMPTZ DEFAULT now()
+    );
+    """,
+]
+# 행마다 다른 상품 / 유형 — 임베드가 행 단위로 조회되면 쿼리 수가 이만큼 늘어남
+ROWS = 30
+WEEK = "pytest-week"
+
+
+@pytest.fixture
+def client(test_db):
+    conn = get_connection()
+    cur = conn.cursor()
+    for sql in SCHEMA_STATEMENTS:
+        cur.execute(sql)
+    product_ids, copy_type_ids = [], []
+    for i in range(ROWS):
+        cur.execute("INSERT INTO products (name) VALUES (%s) RETURNING id", [f"pytest product {i}"])
+        product_ids.append(cur.fetchone()[0])
+        cur.execute("INSERT INTO copy_types (code, name) VALUES (%s, %s) RETURNING id", [f"T{i}", f"pytest type {i}"])
+        copy_type_ids.append(cur.fetchone()[0])
+        cur.execute(
+            "INSERT INTO copies (product_id, copy_type_id, content) VALUES (%s, %s, 'pytest')",
+            [product_ids[-1], copy_type_ids[-1]],
+        )
+        cur.execute(
+            "INSERT INTO checklists (week, product_id, copy_type_id, utm_code) VALUES (%s, %s, %s, '[]')",
+            [WEEK, product_ids[-1], copy_type_ids[-1]],
+        )
+    # FK 관계는 서버 시작 때 미리 읽으므로 (api.warm_relationships) 예산에서 제외
+    load_relationships(reload=True)
+    yield TestClient(app)
+
+    cur.execute("DELETE FROM checklists WHERE product_id = ANY(%s::uuid[])", [product_ids])
+    cur.execute("DELETE FROM copies WHERE product_id = ANY(%s::uuid[])", [product_ids])
+    cur.execute("DELETE FROM products WHERE id = ANY(%s::uuid[])", [product_ids])
+    cur.execute("DELETE FROM copy_types WHERE id = ANY(%s::uuid[])", [copy_type_ids])
+    conn.close()
+
+
+def test_list_copies_embeds_in_batches(client):
+    # 본문 1 + 임베드(products, copy_types) 각 1
+    with assert_max_queries(3):
+        response = client.get("/api/copies")
+    assert response.status_code == 200
+    rows = [row for row in response.json() if row["content"] == "pytest"]
+    assert len(rows) == ROWS
+    assert all(row["product"]["name"].startswith("pytest") for row in rows)
+
+
+def test_copies_page_embeds_in_batches(client):
+    with assert_max_queries(3):
+        first = client.get("/api/copies/page", params={"limit": 10}).json()
+    assert len(first["data"]) == 10
+    # 다음 페이지는 커서 값 변환용 컬럼 타입 조회(테이블당 1회)가 더해짐
+    with assert_max_queries(4):
+        second = client.get("/api/copies/page", params={"limit": 10, "cursor": first["next_cursor"]}).json()
+    assert {row["id"] for row in first["data"]}.isdisjoint(row["id"] for row in second["data"])
+
+
+def test_list_checklists_embeds_in_batches(client):
+    with assert_max_queries(3):
+        response = client.get("/api/checklists", params={"week": WEEK})
+    assert response.status_code == 200
+    assert len(response.json()) == ROWS
+    assert all(row["copy_type"]["code"].startswith("T") for row in response.json())
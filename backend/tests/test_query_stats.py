@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from query_stats import assert_max_queries, capture_queries, record_query
+
+
+def _record(sql="SELECT * FROM copies WHERE id = %s"):
+    record_query(sql, 0.001, rows=1)
+
+
+def test_capture_queries_collects_fingerprints():
+    with capture_queries() as captured:
+        _record()
+        _record("SELECT * FROM copies WHERE id IN (%s, %s, %s)")
+    assert captured == [
+        "SELECT * FROM copies WHERE id = ?",
+        "SELECT * FROM copies WHERE id IN (?, ...)",
+    ]
+
+
+def test_capture_queries_ignores_other_threads():
+    # 스케줄러 작업 등 다른 스레드(컨텍스트)의 쿼리는 수집하지 않음
+    with capture_queries() as captured:
+        worker = threading.Thread(target=_record)
+        worker.start()
+        worker.join()
+    assert captured == []
+
+
+def test_nested_captures_both_collect():
+    with capture_queries() as outer:
+        _record()
+        with capture_queries() as inner:
+            _record()
+    assert len(outer) == 2
+    assert len(inner) == 1
+
+
+def test_assert_max_queries_counts_endpoint_queries():
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_endpoint():
+        _record()
+        _record()
+        return {}
+
+    @app.get("/async")
+    async def async_endpoint():
+        _record()
+        return {}
+
+    client = TestClient(app)
+    with assert_max_queries(3) as captured:
+        client.get("/sync")
+        client.get("/async")
+    assert len(captured) == 3
+
+    with pytest.raises(AssertionError, match="Expected at most 1 queries, got 2"):
+        with assert_max_queries(1):
+            client.get("/sync")
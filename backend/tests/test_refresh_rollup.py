@@ -0,0 +1,85 @@
+import threading
+import uuid
+from datetime import date
+
+import pytest
+
+import migrate_utm_daily_rollup
+import migrate_utm_lookup
+import migrate_utm_monthly_rollup
+import migrate_utm_spend_state
+from ad_performance.refresh_rollup import refresh_utm_daily_rollup
+from ad_performance.utm import UTM_MONTHLY_ROLLUP_TABLE, UTM_ROLLUP_TABLE, UTM_SPEND_STATE_TABLE
+from db import fetch_all, get_connection
+
+# 원본 테이블은 수집 파이프라인이 만들므로 테스트 DB에는 롤업에 필요한 컬럼만 생성
+SOURCE_STATEMENTS = [
+    "CREATE SCHEMA IF NOT EXISTS ad_performance;",
+    """
+    CREATE TABLE IF NOT EXISTS ad_performance.meta_daily_perform (
+        id SERIAL PRIMARY KEY, ad_code TEXT, date DATE, spend NUMERIC, impressions INTEGER, clicks INTEGER
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ad_performance.cafe24_daily_perform (
+        id SERIAL PRIMARY KEY, ad_code TEXT, date DATE, revenue NUMERIC, conversions INTEGER
+    );
+    """,
+]
+MIGRATIONS = [migrate_utm_lookup, migrate_utm_daily_rollup, migrate_utm_monthly_rollup, migrate_utm_spend_state]
+
+INSERT_META = "INSERT INTO ad_performance.meta_daily_perform (ad_code, date, spend, impressions, clicks) VALUES (%s, %s, %s, 0, 0)"
+
+
+@pytest.fixture
+def utm_code(test_db):
+    """롤업 테이블을 만들고 이 테스트만 쓰는 UTM 코드를 넘김 (끝나면 원본 행을 지우고 롤업에서도 빼냄)"""
+    conn = get_connection()
+    conn.autocommit = False
+    cur = conn.cursor()
+    for sql in SOURCE_STATEMENTS + [sql for migration in MIGRATIONS for sql in migration.STATEMENTS]:
+        cur.execute(sql)
+    conn.commit()
+    conn.close()
+    refresh_utm_daily_rollup()
+
+    code = f"pytest{uuid.uuid4().hex}"
+    yield code
+
+    conn = get_connection()
+    conn.cursor().execute("DELETE FROM ad_performance.meta_daily_perform WHERE ad_code LIKE %s", [f"%{code}%"])
+    conn.close()
+    refresh_utm_daily_rollup()
+
+
+def _spend(utm_code, day):
+    daily = fetch_all(f"SELECT spend FROM {UTM_ROLLUP_TABLE} WHERE utm_code = %s AND date = %s", [utm_code, day])
+    monthly = fetch_all(
+        f"SELECT spend FROM {UTM_MONTHLY_ROLLUP_TABLE} WHERE utm_code = %s AND month = %s",
+        [utm_code, day.replace(day=1)],
+    )
+    state = fetch_all(f"SELECT lifetime_spend FROM {UTM_SPEND_STATE_TABLE} WHERE utm_code = %s", [utm_code])
+    return daily[0][0], monthly[0][0], state[0][0]
+
+
+def test_refresh_keeps_dates_written_by_open_ingest_transaction(utm_code):
+    day = date(2001, 1, 15)
+    ad_code = f"[pytest]{utm_code}(test)"
+    writer = get_connection()
+    try:
+        # 이미 dirty인 날짜에 커밋 전 수집 트랜잭션이 행을 더 쓰는 동안 갱신이 돌아도
+        writer.cursor().execute(INSERT_META, [ad_code, day, 1])
+        writer.autocommit = False
+        writer.cursor().execute(INSERT_META, [ad_code, day, 100])
+
+        refresh = threading.Thread(target=refresh_utm_daily_rollup)
+        refresh.start()
+        refresh.join(timeout=5)
+        writer.commit()
+        refresh.join()
+    finally:
+        writer.close()
+
+    # 커밋된 변경분은 다음 갱신에서 빠짐없이 집계됨
+    refresh_utm_daily_rollup()
+    assert _spend(utm_code, day) == (101, 101, 101)
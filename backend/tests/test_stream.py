@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+import db
+from api import json_array_response
+from db import PoolTimeoutError, QueryBuilder, get_pool_stats
+
+# 시스템 카탈로그는 search_path와 무관하게 보이므로 테스트 DB에 테이블을 만들지 않고 조회
+SMALL_TABLE = "pg_namespace"  # 수 행
+LARGE_TABLE = "pg_type"  # 수백 행
+
+
+def _in_use():
+    return get_pool_stats()["in_use"]
+
+
+def test_small_stream_releases_connection_before_first_row(test_db):
+    rows = QueryBuilder(SMALL_TABLE).select("nspname").stream()
+    first = next(rows)
+    assert first["nspname"]
+    assert _in_use() == 0
+    assert len([first, *rows]) > 1
+
+
+def test_large_stream_holds_connection_until_closed(test_db):
+    rows = QueryBuilder(LARGE_TABLE).select("typname").stream(itersize=10)
+    next(rows)
+    assert _in_use() == 1
+    rows.close()
+    assert _in_use() == 0
+
+
+def test_concurrent_streams_are_capped(test_db, monkeypatch):
+    monkeypatch.setattr(db, "_stream_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(db, "POOL_TIMEOUT", 0.1)
+    held = QueryBuilder(LARGE_TABLE).select("typname").stream(itersize=10)
+    next(held)
+    with pytest.raises(PoolTimeoutError):
+        next(QueryBuilder(LARGE_TABLE).select("typname").stream(itersize=10))
+    held.close()
+    assert len(list(QueryBuilder(SMALL_TABLE).select("nspname").stream())) > 1
+
+
+def test_json_array_response_closes_rows_when_client_disconnects():
+    closed = []
+
+    def rows():
+        try:
+            for i in range(100000):
+                yield {"id": i}
+        finally:
+            closed.append(True)
+
+    response = json_array_response(rows(), chunk_size=16)
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("client went away")
+
+    with pytest.raises(Exception):
+        asyncio.run(response(scope, receive, send))
+    assert closed == [True]
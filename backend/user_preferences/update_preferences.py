@@ -5,20 +5,13 @@ from db import get_db_client
 
 def update_preferences(user_id: str, preferences: dict) -> dict:
     client = get_db_client()
-    # Try update first
-    existing = client.table("user_preferences").select("id").eq("user_id", user_id).single().execute()
-    if existing.data:
-        result = client.table("user_preferences").update({
-            "preferences": json.dumps(preferences),
-            "updated_at": "now()"
-        }).eq("user_id", user_id).execute()
-        return result.data[0] if result.data else {}
-    else:
-        result = client.table("user_preferences").insert({
-            "user_id": user_id,
-            "preferences": json.dumps(preferences)
-        }).execute()
-        return result.data[0] if result.data else {}
+    # user_id UNIQUE 기준 upsert (조회 후 분기 없이 1회 쿼리)
+    result = client.table("user_preferences").upsert({
+        "user_id": user_id,
+        "preferences": json.dumps(preferences),
+        "updated_at": "now()"
+    }, on_conflict=["user_id"]).execute()
+    return result.data[0] if result.data else {}
 
 
 def main(user_id: str, preferences_json: str):
@@ -24,6 +24,7 @@ import type {
   CopyTypePerformance,
   WeeklyTeamPerformance,
   AuditLog,
+  Page,
   UserPreferences,
 } from '@/types';
 
@@ -193,6 +194,13 @@ export const auditLogsApi = {
     params.append('offset', String(offset));
     return fetchAPI<AuditLog[]>(`/api/audit-logs?${params}`);
   },
+  page: (tableName?: string, limit = 100, cursor?: string | null) => {
+    const params = new URLSearchParams();
+    if (tableName) params.append('table_name', tableName);
+    params.append('limit', String(limit));
+    if (cursor) params.append('cursor', cursor);
+    return fetchAPI<Page<AuditLog>>(`/api/audit-logs/page?${params}`);
+  },
 };
 
 // User Preferences API
@@ -37,20 +37,20 @@ export default function AuditLogs() {
   const [logs, setLogs] = useState<AuditLog[]>([]);
   const [tableFilter, setTableFilter] = useState('all');
   const [loading, setLoading] = useState(false);
-  const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [detailLog, setDetailLog] = useState<AuditLog | null>(null);
   const [startDate, setStartDate] = useState('');
   const [endDate, setEndDate] = useState('');
   const [userFilter, setUserFilter] = useState('');
   const PAGE_SIZE = 50;
 
-  const fetchLogs = async (offset = 0, append = false) => {
+  const fetchLogs = async (cursor: string | null = null, append = false) => {
     setLoading(true);
     try {
       const tableName = tableFilter === 'all' ? undefined : tableFilter;
-      const data = await auditLogsApi.list(tableName, PAGE_SIZE, offset);
-      setLogs(prev => append ? [...prev, ...data] : data);
-      setHasMore(data.length === PAGE_SIZE);
+      const page = await auditLogsApi.page(tableName, PAGE_SIZE, cursor);
+      setLogs(prev => append ? [...prev, ...page.data] : page.data);
+      setNextCursor(page.next_cursor);
     } catch (e) {
       console.error('Failed to fetch audit logs:', e);
     } finally {
@@ -59,7 +59,7 @@ export default function AuditLogs() {
   };
 
   useEffect(() => {
-    fetchLogs(0, false);
+    fetchLogs(null, false);
   }, [tableFilter]);
 
   const filteredLogs = logs.filter(log => {
@@ -140,9 +140,9 @@ export default function AuditLogs() {
               )}
             </TableBody>
           </Table>
-          {hasMore && logs.length > 0 && (
+          {nextCursor && logs.length > 0 && (
             <div className="mt-4 flex justify-center">
-              <Button variant="outline" onClick={() => fetchLogs(logs.length, true)} disabled={loading}>
+              <Button variant="outline" onClick={() => fetchLogs(nextCursor, true)} disabled={loading}>
                 {loading ? '로딩 중...' : '더 보기'}
               </Button>
             </div>
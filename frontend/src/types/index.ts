@@ -117,7 +117,7 @@ export interface BestCopy {
   month: string;
   ad_spend: number;
   created_at: string;
-  generated_copies?: GeneratedCopy;
+  copy?: GeneratedCopy;
 }
 
 export interface BestCopyCreate {
@@ -233,3 +233,9 @@ export interface AuditLog {
   changes: Record<string, unknown> | null;
   created_at: string;
 }
+
+// Keyset pagination (`/page` endpoints)
+export interface Page<T> {
+  data: T[];
+  next_cursor: string | null;
+}